@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""bench_alias_sampler.py
+
+Microbenchmark of the alias table (strutils.common.sampling) against
+random.choices() with weights, as randstr used to sample weighted
+alphabets.  The two draw different characters, so instead of comparing
+results, checks that the alias table follows the weights.
+
+USAGE: ./benchmarks/bench_alias_sampler.py
+"""
+
+import collections
+import itertools
+import math
+import random
+import timeit
+from typing import Final
+
+from strutils.common.sampling import AliasTable
+
+# Number of characters to draw per call, like `randstr 100000`.
+LENGTH: Final = 100_000
+
+# Zipf-like counts, as in an alphabet read from a corpus with -f.
+ALPHABETS: Final = {
+    size: (
+        "".join(chr(0x4E00 + index) for index in range(size)),
+        [1_000_000 // (index + 1) + 1 for index in range(size)],
+    )
+    for size in (16, 256, 4096, 20_000)
+}
+
+
+def check_distribution(table: AliasTable[str], charset: str,
+                       counts: list[int]) -> None:
+    # Pearson's chi-squared statistic has a mean of the degrees of freedom
+    # and a variance of twice that, so it's way off if the table is wrong.
+    draws = 1_000_000
+    frequencies = collections.Counter(table.choices(draws))
+    total = sum(counts)
+    statistic = sum(
+        (frequencies[ch] - draws * count / total) ** 2
+        / (draws * count / total)
+        for ch, count in zip(charset, counts)
+    )
+    freedom = len(charset) - 1
+    assert statistic < freedom + 6 * math.sqrt(2 * freedom), statistic
+
+
+def main() -> None:
+    for size, (charset, counts) in ALPHABETS.items():
+        table = AliasTable(charset, counts)
+        check_distribution(table, charset, counts)
+
+        baseline = min(timeit.repeat(
+            lambda: "".join(random.choices(charset, k=LENGTH,
+                                           weights=counts)),
+            number=5, repeat=3,
+        ))
+        cum_weights = list(itertools.accumulate(counts))
+        cumulative = min(timeit.repeat(
+            lambda: "".join(random.choices(charset, k=LENGTH,
+                                           cum_weights=cum_weights)),
+            number=5, repeat=3,
+        ))
+        alias = min(timeit.repeat(
+            lambda: "".join(table.choices(LENGTH)),
+            number=5, repeat=3,
+        ))
+        print(f"{size:>6} chars: weights {baseline:.4f}s, "
+              f"cum_weights {cumulative:.4f}s, alias {alias:.4f}s "
+              f"({baseline / alias:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
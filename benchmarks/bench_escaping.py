@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""bench_escaping.py
+
+Microbenchmark of the shared escape table (strutils.common.escaping)
+against calling repr() on every character, as chr and ord used to.
+Also checks that both produce the same results.
+
+USAGE: ./benchmarks/bench_escaping.py
+"""
+
+import timeit
+from typing import Final
+
+from strutils.common.escaping import escape
+
+SAMPLES: Final = {
+    "ascii": "The quick brown fox jumps over the lazy dog.\n" * 2000,
+    "latin-1": "Ça été très naïve, façade «déjà vu»\t¿qué?\n" * 2000,
+    "cjk": "".join(chr(code) for code in range(0x4E00, 0x4E00 + 500)) * 200,
+}
+
+
+def repr_escape(ch: str) -> str:
+    return repr(ch).strip("'\"")
+
+
+def main() -> None:
+    for name, text in SAMPLES.items():
+        assert [escape(ch) for ch in text] == [repr_escape(ch) for ch in text]
+
+        baseline = min(timeit.repeat(lambda: [repr_escape(ch) for ch in text],
+                                     number=5, repeat=5))
+        table = min(timeit.repeat(lambda: [escape(ch) for ch in text],
+                                  number=5, repeat=5))
+        print(f"{name:>8}: repr {baseline:.4f}s, table {table:.4f}s "
+              f"({baseline / table:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""bench_ord_formatting.py
+
+Microbenchmark of the memoized formatting tables of ord's CharFormatter
+against formatting every character from scratch, as ord used to.  Also
+checks that both produce the same results.
+
+USAGE: ./benchmarks/bench_ord_formatting.py
+"""
+
+import timeit
+from typing import Final
+
+from strutils.ord import CharFormatter, parser
+
+SAMPLES: Final = {
+    "ascii": "The quick brown fox jumps over the lazy dog.\n" * 2000,
+    "latin-1": "Ça été très naïve, façade «déjà vu»\t¿qué?\n" * 2000,
+    "cjk": "".join(chr(code) for code in range(0x4E00, 0x4E00 + 500)) * 200,
+}
+
+ARGUMENTS: Final = {
+    "decimal": [],
+    "hex": ["-X", "-p"],
+    "binary": ["-b"],
+}
+
+
+def format_from_scratch(formatter: CharFormatter, text: str) -> str:
+    return " ".join(formatter.format_code(ord(ch), formatter.width)
+                    for ch in text)
+
+
+def format_with_tables(formatter: CharFormatter, text: str) -> str:
+    return " ".join(formatter.format_all(text, False))
+
+
+def main() -> None:
+    for name, text in SAMPLES.items():
+        for radix, arguments in ARGUMENTS.items():
+            formatter = CharFormatter(parser.parse_args([*arguments, text]))
+            assert format_from_scratch(formatter, text) \
+                == format_with_tables(formatter, text)
+
+            baseline = min(timeit.repeat(
+                lambda: format_from_scratch(formatter, text),
+                number=5, repeat=5,
+            ))
+            tables = min(timeit.repeat(
+                lambda: format_with_tables(formatter, text),
+                number=5, repeat=5,
+            ))
+            print(f"{name:>8} {radix:>7}: scratch {baseline:.4f}s, "
+                  f"tables {tables:.4f}s ({baseline / tables:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
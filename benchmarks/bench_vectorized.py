@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""bench_vectorized.py
+
+Microbenchmark of the NumPy engine (strutils.common.vectorized) against
+the pure-Python paths of ord and chr on large inputs.  Also checks that
+both produce the same results.
+
+USAGE: ./benchmarks/bench_vectorized.py
+"""
+
+import itertools
+import random
+import sys
+import timeit
+from array import array
+from typing import Final
+
+from strutils.chr import parse_code_point
+from strutils.common import vectorized
+from strutils.ord import CharFormatter, parser
+
+TEXT: Final = "Ça été très naïve, 漢字かな交じり文 😀\n" * 100_000
+
+RANDOM = random.Random(0)
+HEX_TOKENS: Final = [
+    f"{RANDOM.randrange(0xC000, 0x110000):X}" for _ in range(500_000)
+]
+
+ORD_ARGUMENTS: Final = {
+    "decimal": [],
+    "hex": ["-X", "-p"],
+    "octal": ["-o"],
+    "binary": ["-b"],
+}
+
+
+def main() -> None:
+    if vectorized.np is None:
+        print("NumPy is not installed, skipping", file=sys.stderr)
+        return
+
+    for radix, arguments in ORD_ARGUMENTS.items():
+        formatter = CharFormatter(parser.parse_args([*arguments, TEXT]),
+                                  vectorize_from=0)
+        assert formatter.join(TEXT, " ") \
+            == " ".join(formatter.format_all(TEXT, False))
+
+        baseline = min(timeit.repeat(
+            lambda: " ".join(formatter.format_all(TEXT, False)),
+            number=1, repeat=3,
+        ))
+        numpy = min(timeit.repeat(lambda: formatter.join(TEXT, " "),
+                                  number=1, repeat=3))
+        print(f"ord {radix:>7}: python {baseline:.4f}s, numpy {numpy:.4f}s "
+              f"({baseline / numpy:.1f}x)")
+
+    def parse_in_python() -> array:
+        return array("I", map(parse_code_point, HEX_TOKENS,
+                              itertools.repeat(16)))
+
+    assert vectorized.parse_code_points(HEX_TOKENS, 16) == parse_in_python()
+    baseline = min(timeit.repeat(parse_in_python, number=1, repeat=3))
+    numpy = min(timeit.repeat(
+        lambda: vectorized.parse_code_points(HEX_TOKENS, 16),
+        number=1, repeat=3,
+    ))
+    print(f"chr     hex: python {baseline:.4f}s, numpy {numpy:.4f}s "
+          f"({baseline / numpy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,9 @@
 A collection of scripts intended to be added to the user's PATH.  They
 are intended as Unix-like interfaces to Python's string manipulation
 utilities.  They are organized as a package for installation purposes
-and are not intended to be imported from.
+and are not intended to be imported from, with the exception of the
+`strutils.aio` subpackage, which exposes some of the transformations as
+asyncio streaming interfaces.
 """
 
 __author__ = "Vincent Lin"
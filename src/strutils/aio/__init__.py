@@ -0,0 +1,317 @@
+"""
+Asynchronous streaming interfaces to the transformations performed by
+the ord, chr, upper, lower, and snippet scripts, for embedding them in
+asyncio services without blocking the event loop on large payloads.
+
+Every function takes a SOURCE, which is either an asyncio.StreamReader
+or an async iterable of str or bytes chunks (bytes are decoded
+incrementally with `encoding`), and is an async generator of the
+transformed text in chunks::
+
+    async for chunk in strutils.aio.lower(reader):
+        writer.write(chunk.encode())
+        await writer.drain()
+
+Backpressure comes for free: the SOURCE is only read from when the
+consumer asks for the next chunk.  Batches of at least
+`offload_threshold` characters are transformed in `executor` (the event
+loop's default executor if None) so that CPU-heavy work doesn't stall
+other tasks.  All transformations are picklable, so a
+ProcessPoolExecutor can be used to sidestep the GIL entirely.
+
+Where a transformation depends on the surrounding characters, input is
+only split on token boundaries (whitespace, or DELIM for title case), so
+the output is the same as transforming the whole input at once.  The
+exception is text without a boundary for more than MAX_CARRY_SIZE
+characters, which is passed on anyway to keep memory bounded (chr
+tokens are never split).  Unlike the scripts, no trailing newline is
+appended.
+"""
+
+import asyncio
+import codecs
+import functools
+import json
+from argparse import Namespace
+from collections.abc import AsyncIterable, AsyncIterator, Callable
+from concurrent.futures import Executor
+from typing import Final, TypeVar
+
+from ..chr import decode_code_point, parse_code_point
+from ..common.streaming import (DEFAULT_CHUNK_SIZE,
+                                split_after_last_separator,
+                                split_complete_lines)
+from ..ord import CharFormatter
+from ..snippet import format_body_entry
+from ..upper import transform_to_title_case
+
+T = TypeVar("T")
+
+Source = asyncio.StreamReader | AsyncIterable[str] | AsyncIterable[bytes]
+
+# Batches smaller than this many characters are transformed inline since
+# the overhead of dispatching them to an executor would dominate.
+DEFAULT_OFFLOAD_THRESHOLD: Final = 1 << 14
+
+# Text held back while waiting for a token boundary is passed on anyway
+# once it grows past this many characters.
+MAX_CARRY_SIZE: Final = 1 << 16
+
+
+async def lower(
+    source: Source,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    encoding: str = "utf-8",
+    executor: Executor | None = None,
+    offload_threshold: int = DEFAULT_OFFLOAD_THRESHOLD,
+) -> AsyncIterator[str]:
+    """Apply str.lower() on the text from SOURCE."""
+    text = _iter_text(source, chunk_size=chunk_size, encoding=encoding)
+    # Only split on whitespace since a capital sigma is lowercased
+    # differently at the end of a word.
+    batches = _iter_batches(text, separator=None,
+                            max_carry_size=MAX_CARRY_SIZE)
+    async for batch in batches:
+        yield await _run(str.lower, batch, len(batch),
+                         executor, offload_threshold)
+
+
+async def upper(
+    source: Source,
+    *,
+    title: bool = False,
+    force: bool = False,
+    delimiter: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    encoding: str = "utf-8",
+    executor: Executor | None = None,
+    offload_threshold: int = DEFAULT_OFFLOAD_THRESHOLD,
+) -> AsyncIterator[str]:
+    """
+    Apply str.upper() on the text from SOURCE, or capitalize only the
+    first character of each WORD if `title` is set.  `force` and
+    `delimiter` have the same meaning as the -f and -d options of upper.
+    """
+    transform: Callable[[str], str]
+    if title:
+        transform = functools.partial(transform_to_title_case,
+                                      delimiter=delimiter,
+                                      force=force)
+    else:
+        transform = str.upper
+
+    batches: AsyncIterable[str]
+    batches = _iter_text(source, chunk_size=chunk_size, encoding=encoding)
+    if title:
+        # Unlike str.upper(), title case depends on the word boundaries.
+        batches = _iter_batches(batches, separator=delimiter,
+                                max_carry_size=MAX_CARRY_SIZE)
+    async for batch in batches:
+        yield await _run(transform, batch, len(batch),
+                         executor, offload_threshold)
+
+
+async def ord(  # pylint: disable=redefined-builtin
+    source: Source,
+    *,
+    hexadecimal: bool = False,
+    octal: bool = False,
+    octal_c_style: bool = False,
+    binary: bool = False,
+    uppercase: bool = False,
+    prefixed: bool = False,
+    delimiter: str = " ",
+    width: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    encoding: str = "utf-8",
+    executor: Executor | None = None,
+    offload_threshold: int = DEFAULT_OFFLOAD_THRESHOLD,
+) -> AsyncIterator[str]:
+    """
+    Apply ord() on every character from SOURCE and format the code
+    points like the ord script.  Since the input isn't known upfront,
+    the zero-fill `width` is fixed instead of computed from the largest
+    code point.
+    """
+    options = Namespace(strings=[],
+                        prefixed=prefixed,
+                        uppercase=uppercase,
+                        X=False,
+                        hexadecimal=hexadecimal,
+                        octal=octal,
+                        use_octal_c_style=octal_c_style,
+                        binary=binary)
+    formatter = CharFormatter(options, width=width)
+    transform = functools.partial(_format_chars, formatter, delimiter)
+
+    first = True
+    text = _iter_text(source, chunk_size=chunk_size, encoding=encoding)
+    async for batch in text:
+        formatted = await _run(transform, batch, len(batch),
+                               executor, offload_threshold)
+        yield formatted if first else delimiter + formatted
+        first = False
+
+
+async def chr(  # pylint: disable=redefined-builtin
+    source: Source,
+    *,
+    base: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    encoding: str = "utf-8",
+    executor: Executor | None = None,
+    offload_threshold: int = DEFAULT_OFFLOAD_THRESHOLD,
+) -> AsyncIterator[str]:
+    """
+    Decode the whitespace-separated code points from SOURCE and yield
+    the characters as they are (like chr --print).  If `base` is None,
+    it is inferred from the prefix of each code point.
+
+    Raises:
+        ValueError: A code point could not be parsed or decoded.
+    """
+    transform = functools.partial(_decode_tokens, base=base)
+    text = _iter_text(source, chunk_size=chunk_size, encoding=encoding)
+    async for batch in _iter_batches(text, separator=None):
+        tokens = batch.split()
+        if tokens:
+            yield await _run(transform, tokens, len(batch),
+                             executor, offload_threshold)
+
+
+async def snippet(
+    source: Source,
+    *,
+    indentation: str = " " * 4,
+    trailing_comma: bool = False,
+    prefix: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    encoding: str = "utf-8",
+    executor: Executor | None = None,
+    offload_threshold: int = DEFAULT_OFFLOAD_THRESHOLD,
+) -> AsyncIterator[str]:
+    """
+    Convert the lines from SOURCE into a JSON array of strings for the
+    "body" field of a VS Code snippet, like the snippet script.
+    """
+    async def iter_lines() -> AsyncIterator[list[str]]:
+        carry = ""
+        text = _iter_text(source, chunk_size=chunk_size, encoding=encoding)
+        async for chunk in text:
+            lines, carry = split_complete_lines(carry + chunk)
+            if lines:
+                yield lines
+        if carry:
+            yield carry.splitlines()
+
+    async def format_entries(lines: list[str], last_comma: bool) -> str:
+        transform = functools.partial(_format_body_entries,
+                                      indentation=indentation,
+                                      last_comma=last_comma)
+        size = sum(len(line) for line in lines)
+        return await _run(transform, lines, size,
+                          executor, offload_threshold)
+
+    if prefix is not None:
+        yield f"\"prefix\": {json.dumps(prefix)},\n\"body\": "
+    yield "[\n"
+
+    # Hold back the latest lines since whether the last one gets a comma
+    # depends on whether there are any lines after it.
+    previous: list[str] = []
+    async for lines in iter_lines():
+        if previous:
+            yield await format_entries(previous, last_comma=True)
+        previous = lines
+    if previous:
+        yield await format_entries(previous, last_comma=trailing_comma)
+
+    yield "]"
+
+
+async def _iter_text(
+    source: Source,
+    *,
+    chunk_size: int,
+    encoding: str,
+) -> AsyncIterator[str]:
+    chunks: AsyncIterable[str] | AsyncIterable[bytes]
+    if isinstance(source, asyncio.StreamReader):
+        chunks = _iter_stream_reader(source, chunk_size)
+    else:
+        chunks = source
+
+    decoder = codecs.getincrementaldecoder(encoding)()
+    async for chunk in chunks:
+        text = decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        if text:
+            yield text
+
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def _iter_stream_reader(
+    reader: asyncio.StreamReader,
+    chunk_size: int,
+) -> AsyncIterator[bytes]:
+    while chunk := await reader.read(chunk_size):
+        yield chunk
+
+
+async def _iter_batches(
+    text: AsyncIterable[str],
+    separator: str | None,
+    max_carry_size: int | None = None,
+) -> AsyncIterator[str]:
+    """
+    Re-chunk text such that every batch ends on a separator, unless more
+    than `max_carry_size` characters go by without one.
+    """
+    carry = ""
+    async for chunk in text:
+        batch, carry = split_after_last_separator(carry + chunk, separator)
+        if max_carry_size is not None and len(carry) > max_carry_size:
+            batch, carry = batch + carry, ""
+        if batch:
+            yield batch
+    if carry:
+        yield carry
+
+
+async def _run(
+    transform: Callable[[T], str],
+    batch: T,
+    size: int,
+    executor: Executor | None,
+    offload_threshold: int,
+) -> str:
+    if size < offload_threshold:
+        return transform(batch)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, transform, batch)
+
+
+def _format_chars(formatter: CharFormatter, delimiter: str, text: str) -> str:
+    return delimiter.join(formatter.format_all(text, False))
+
+
+def _decode_tokens(tokens: list[str], base: int | None) -> str:
+    return "".join(
+        decode_code_point(parse_code_point(token, base), token)
+        for token in tokens
+    )
+
+
+def _format_body_entries(
+    lines: list[str],
+    indentation: str,
+    last_comma: bool,
+) -> str:
+    last_index = len(lines) - 1
+    return "".join(
+        format_body_entry(line, indentation, index < last_index or last_comma)
+        for index, line in enumerate(lines)
+    )
@@ -13,6 +13,10 @@ Non-decimal base systems can be inferred by their respective prefixes
 (0x, 0o/0, 0b), or the inputs can be explicitly interpreted with a
 chosen base by including the command line flag for it.
 
+Ranges of code points can be written as `START..END[:STEP]` or
+`START-END[:STEP]` (END inclusive). They are expanded lazily, so even
+all of Unicode can be dumped in constant memory.
+
 EXAMPLES::
 
     $ chr 65 66 67
@@ -24,13 +28,57 @@ EXAMPLES::
 
     $ chr -d _ $(seq 68 75)
     D_E_F_G_H_I_J_K
+
+    $ chr -p 0x41..0x5A:2 97-101
+    ACEGIKMOQSUWYabcde
 """
 
+import contextlib
+import functools
+import itertools
+import operator
+import re
 import sys
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import BinaryIO, Final, Iterable, Iterator, TextIO
 
-from .common import parsing
+from .common import parsing, vectorized
+from .common.escaping import escape
 from .common.functional import readonly_struct
-from .common.output import exit_with_error, print_stderr
+from .common.output import (exit_with_error, log_warning, print_joined,
+                            print_stderr)
+from .common.packing import (PACKED_FORMATS, U32_TYPECODE,
+                             code_points_to_text, iter_unpacked)
+from .common.streaming import iter_token_batches
+from .common.unicode import ANNOTATION_FIELDS, Annotator
+
+ON_ERROR_FAIL: Final = "fail"
+ON_ERROR_SKIP: Final = "skip"
+ON_ERROR_REPLACE: Final = "replace"
+
+# U+FFFD REPLACEMENT CHARACTER, what --on-error=replace decodes to.
+REPLACEMENT_CODE_POINT: Final = 0xFFFD
+
+# Code points are in range(MAX_CODE_POINT_EXCLUSIVE).
+MAX_CODE_POINT_EXCLUSIVE: Final = 0x110000
+
+FIRST_SURROGATE: Final = 0xD800
+LAST_SURROGATE: Final = 0xDFFF
+
+# General category of code points not assigned to any character.
+UNASSIGNED_CATEGORY: Final = "Cn"
+
+# Maximum number of code points per array when a batch of tokens has to
+# be decoded token by token, since its ranges can expand to any number.
+DECODED_BATCH_SIZE: Final = 1 << 16
+
+# START..END[:STEP] or START-END[:STEP]. A leading "-" is not matched so
+# that negative numbers are still reported as such.
+RANGE_PATTERN: Final = re.compile(
+    r"(?P<start>[^.:-]+)(?:\.\.|-)(?P<end>[^.:-]+)(?::(?P<step>[^.:-]+))?",
+)
 
 
 @readonly_struct
@@ -44,6 +92,14 @@ class ProgramOptions:
     use_hexadecimal: bool
     use_octal: bool
     use_binary: bool
+    on_error: str
+    errors_path: Path | None
+    align_window: int | None
+    packed_format: str | None
+    skip_surrogates: bool
+    skip_unassigned: bool
+    annotate: list[str] | None
+    engine: str
 
 
 # Disable -h to use it for hexadecimal.
@@ -53,7 +109,8 @@ parser.add_argument(
     "code_points",
     metavar="CODE",
     nargs="*",
-    help="numbers to interpret as Unicode codepoints",
+    help="numbers to interpret as Unicode codepoints, or ranges of them "
+         "in the format `START..END[:STEP]` or `START-END[:STEP]`",
 )
 parser.add_argument(
     "-e", "--echo",
@@ -111,134 +168,554 @@ radix_group.add_argument(
     help="interpret code points as binary",
 )
 
+parser.add_argument(
+    "--skip-surrogates",
+    action="store_true",
+    dest="skip_surrogates",
+    help="when expanding a range, skip surrogate code points "
+         "(U+D800 to U+DFFF), which can't be encoded for output",
+)
+parser.add_argument(
+    "--skip-unassigned",
+    action="store_true",
+    dest="skip_unassigned",
+    help="when expanding a range, skip code points that are not assigned "
+         "to a character (general category Cn)",
+)
+parser.add_argument(
+    "--read",
+    metavar="FORMAT",
+    choices=PACKED_FORMATS,
+    dest="packed_format",
+    help="read code points from stdin in a packed binary FORMAT (one of "
+         f"{', '.join(PACKED_FORMATS)}) as written by `ord --emit`, "
+         "instead of as text; radix options have no effect",
+)
+parser.add_argument(
+    "--align-window",
+    metavar="N",
+    type=parsing.positive_int,
+    dest="align_window",
+    help="align columns only within consecutive blocks of N code points, "
+         "printing each block as its own line(s); the input is then "
+         "streamed instead of read all at once",
+)
+parser.add_argument(
+    "--annotate",
+    metavar="FIELDS",
+    type=parsing.comma_separated_choices(ANNOTATION_FIELDS),
+    dest="annotate",
+    help="append comma-separated Unicode metadata FIELDS "
+         f"({', '.join(ANNOTATION_FIELDS)}) of each character as "
+         "TAB-separated columns, with the character itself escaped; "
+         "implies -1",
+)
+parser.add_argument(
+    "--engine",
+    choices=vectorized.ENGINES,
+    default=vectorized.ENGINE_AUTO,
+    dest="engine",
+    help="decode large batches of plain numbers with NumPy (numpy), or "
+         "always in pure Python (python); auto (default) uses NumPy if it "
+         "is installed",
+)
+parser.add_argument(
+    "--on-error",
+    choices=(ON_ERROR_FAIL, ON_ERROR_SKIP, ON_ERROR_REPLACE),
+    default=ON_ERROR_FAIL,
+    dest="on_error",
+    help="what to do with code points that cannot be decoded: exit "
+         "immediately (default), skip them, or replace them with U+FFFD",
+)
+parser.add_argument(
+    "--errors",
+    metavar="FILE",
+    type=Path,
+    dest="errors_path",
+    help="record each code point that cannot be decoded to FILE as a "
+         "line of the form `INDEX<TAB>TOKEN<TAB>REASON`, where INDEX is "
+         "the 0-based position of the token in the input",
+)
+
 
+@readonly_struct
 class CodePoint:
     """
-    Wrapper class for bundling a raw string with its code point value,
-    interpreted using a specific or inferred base.
+    Bundle of a raw string with its code point value, interpreted using
+    a specific or inferred base.
     """
+    raw: str
+    value: int
 
-    def __init__(
-        self,
-        raw_representation: str,
-        base_to_interpret_as: int | None = None,
-    ) -> None:
-        self.raw = raw_representation
-        self.value = self._convert_int_with_possible_radix_prefix(
-            raw_representation,
-            base=base_to_interpret_as,
-        )
+    @classmethod
+    def from_raw(cls, raw: str, base: int | None = None) -> "CodePoint":
+        """Parse and validate the code point represented by `raw`.
+
+        Raises:
+            ValueError: raw could not be parsed, or the value is not in
+            `range(0x110000)`.
+        """
+        value = parse_code_point(raw, base)
+        # Validate upfront so that char() can never fail.
+        decode_code_point(value, raw)
+        return cls(raw=raw, value=value)
 
     def char(self) -> str:
-        """Return the character mapped by this code point value.
+        """Return the character mapped by this code point value."""
+        return chr(self.value)
 
-        Raises:
-            ValueError: chr() failed on the code point value. This
-            happens if the value is not in `range(0x110000)`.
+
+class DecodeErrorHandler:
+    """
+    Apply the --on-error policy to tokens that could not be decoded,
+    additionally recording each of them to the --errors file if one was
+    requested.
+    """
+
+    def __init__(self, policy: str, errors_file: TextIO | None) -> None:
+        self.policy = policy
+        self.errors_file = errors_file
+        self.error_count = 0
+
+    def __call__(self, index: int, raw: str, reason: str) -> CodePoint | None:
         """
-        try:
-            return chr(self.value)
-        # chr() can raise if arg is not in range(0x110000).
-        except ValueError as error:
-            msg = (
-                "could not get the character of code point "
-                f"{self.raw!r} (decimal {self.value}): {error}"
-            )
-            exit_with_error(msg)
+        Handle the failure to decode the `index`th token `raw`. Return
+        the code point to use in its place, or None to skip the token.
+        """
+        self.error_count += 1
+        if self.errors_file is not None:
+            self.errors_file.write(f"{index}\t{raw}\t{reason}\n")
+
+        if self.policy == ON_ERROR_FAIL:
+            exit_with_error(reason)
+
+        # Errors are summarized at the end if they're being recorded.
+        if self.errors_file is None:
+            log_warning(f"token {index}: {reason}")
+
+        if self.policy == ON_ERROR_SKIP:
+            return None
+        return CodePoint(raw=raw, value=REPLACEMENT_CODE_POINT)
+
+    def report(self) -> None:
+        """Summarize the errors handled, if any."""
+        if self.error_count == 0:
+            return
+        action = "skipped" if self.policy == ON_ERROR_SKIP else "replaced"
+        message = f"{action} {self.error_count} invalid code point(s)"
+        if self.errors_file is not None:
+            message += f", see {self.errors_file.name}"
+        log_warning(message)
+
+
+def parse_code_point(value: str, base: int | None = None) -> int:
+    """
+    Validator for a non-negative integer input, possibly of varying
+    radixes as denoted by their conventional prefix. If base is
+    provided, interpret value with that base regardless of prefix.
+
+    Raises:
+        ValueError: value is negative or could not be interpreted as an
+        integer. The message is suitable for displaying to the user.
+    """
+    if value.startswith("-"):
+        raise ValueError(f"{value} is negative or not an int.")
+
+    if base is not None:
+        value = value.lstrip("0xob")
+        return _cast_int(value, base)
+
+    if value.startswith("0x"):
+        return _cast_int(value, 16)
+
+    # Second condition is to support C-style octal numbers e.g. 0755.
+    if value.startswith("0o") or \
+            value.startswith("0") and value[1:].isnumeric():
+        stripped = value.removeprefix("0").removeprefix("o")
+        return _cast_int(stripped, 8)
+
+    if value.startswith("0b"):
+        return _cast_int(value, 2)
+
+    return _cast_int(value, 10)
 
-    def _convert_int_with_possible_radix_prefix(
+
+def decode_code_point(value: int, raw: str) -> str:
+    """Return the character mapped by code point `value`.
+
+    Raises:
+        ValueError: The code point value is not in `range(0x110000)`,
+        so chr() would fail on it. The message mentions `raw`, the
+        string the value was parsed from.
+    """
+    # chr() raises ValueError if arg is not in range(0x110000), but
+    # OverflowError if it doesn't even fit in a C int, so check upfront.
+    if not 0 <= value < MAX_CODE_POINT_EXCLUSIVE:
+        raise ValueError(_out_of_range_message(value, raw))
+    return chr(value)
+
+
+def _out_of_range_message(value: int, raw: str) -> str:
+    return ("could not get the character of code point "
+            f"{raw!r} (decimal {value}): not in range(0x110000)")
+
+
+def _cast_int(value: str, base: int) -> int:
+    try:
+        return int(value, base)
+    except ValueError:
+        raise ValueError(
+            f"{value} could not be interpreted "
+            f"as an integer with base {base}.",
+        ) from None
+
+
+class CodePointTable:
+    """
+    Compact columnar storage of code points, for the modes that need all
+    of them in memory at once to align their output.  Instead of a
+    CodePoint object per token, the values are packed into an array and
+    the raw tokens are concatenated into a single string, from which
+    they are sliced out by their offsets.
+    """
+
+    def __init__(self) -> None:
+        self.values = array("I")
+        self.max_raw_width = 0
+        self._raw_chunks: list[str] = []
+        # Token i is raw[offsets[i]:offsets[i + 1]].
+        self._raw_offsets = array("Q", [0])
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def extend(
         self,
-        value: str,
-        base: int | None,
-    ) -> int:
+        tokens: list[str],
+        values: Iterable[int],
+        *,
+        joined_tokens: str | None = None,
+    ) -> None:
         """
-        Validator for a non-negative integer input, possibly of varying
-        radixes as denoted by their conventional prefix. If base is
-        provided, interpret value with that base regardless of prefix.
+        Append raw tokens along with their (already validated) values.
+        `joined_tokens` can be passed if "".join(tokens) is already
+        available to avoid computing it again.
         """
-        if value.startswith("-"):
-            exit_with_error(f"{value} is negative or not an int.")
+        self.values.extend(values)
+
+        lengths = list(map(len, tokens))
+        self.max_raw_width = max(self.max_raw_width, max(lengths, default=0))
+        offsets = itertools.accumulate(lengths, initial=self._raw_offsets[-1])
+        self._raw_offsets.extend(itertools.islice(offsets, 1, None))
+
+        if joined_tokens is None:
+            joined_tokens = "".join(tokens)
+        self._raw_chunks.append(joined_tokens)
+
+    def extend_codes(self, codes: Iterable[CodePoint]) -> None:
+        """Append CodePoints, without holding on to the objects."""
+        iterator = iter(codes)
+        while batch := list(itertools.islice(iterator, 1 << 14)):
+            self.extend([code.raw for code in batch],
+                        (code.value for code in batch))
+
+    @property
+    def max_value_width(self) -> int:
+        """The length of the longest value when printed in decimal."""
+        if not self.values:
+            return 0
+        return len(str(max(self.values)))
+
+    def raws(self) -> Iterator[str]:
+        """Iterate over the raw tokens in order."""
+        raw = self._raw
+        offsets = self._raw_offsets
+        return (
+            raw[start:end]
+            for start, end in zip(offsets, itertools.islice(offsets, 1, None))
+        )
 
-        if base is not None:
-            value = value.lstrip("0xob")
-            return self._cast_int(value, base)
+    @functools.cached_property
+    def _raw(self) -> str:
+        raw = "".join(self._raw_chunks)
+        self._raw_chunks.clear()
+        return raw
 
-        if value.startswith("0x"):
-            return self._cast_int(value, 16)
 
-        # Second condition is to support C-style octal numbers e.g. 0755.
-        if value.startswith("0o") or \
-                value.startswith("0") and value[1:].isnumeric():
-            stripped = value.removeprefix("0").removeprefix("o")
-            return self._cast_int(stripped, 8)
+def parse_code_point_range(token: str, base: int | None) -> range | None:
+    """
+    Return the range of code points represented by a token of the form
+    START..END[:STEP] or START-END[:STEP] (END inclusive), or None if
+    the token isn't of that form.  Each part is interpreted the same way
+    as a single code point.
+
+    Raises:
+        ValueError: A part of the range is invalid, or the range extends
+        past the last code point.
+    """
+    match = RANGE_PATTERN.fullmatch(token)
+    if match is None:
+        return None
+
+    start = parse_code_point(match["start"], base)
+    end = parse_code_point(match["end"], base)
+    step_text = match["step"]
+    # With an explicit base, parse_code_point() strips a step of 0 down
+    # to nothing before parsing it, so check for 0 upfront.
+    if step_text is not None and _is_zero(step_text):
+        raise ValueError(f"{token} has a step of 0, but it must be positive.")
+    step = 1 if step_text is None else parse_code_point(step_text, base)
+    if end < start:
+        raise ValueError(f"{token} ends before it starts.")
+    if end >= MAX_CODE_POINT_EXCLUSIVE:
+        raise ValueError(
+            f"{token} extends past the last code point "
+            f"(decimal {MAX_CODE_POINT_EXCLUSIVE - 1}).",
+        )
+    return range(start, end + 1, step)
 
-        if value.startswith("0b"):
-            return self._cast_int(value, 2)
 
-        return self._cast_int(value, 10)
+def _is_zero(value: str) -> bool:
+    for prefix in ("0x", "0o", "0b"):
+        value = value.removeprefix(prefix)
+    return value != "" and value.strip("0") == ""
 
-    def _cast_int(self, value: str, base: int) -> int:
-        try:
-            return int(value, base)
-        except ValueError:
-            exit_with_error(
-                f"{value} could not be interpreted "
-                f"as an integer with base {base}.",
+
+@readonly_struct
+class RangeExpander:
+    """
+    Lazily expand ranges of code points, skipping the kinds of code
+    points requested.
+    """
+    skip_surrogates: bool = False
+    skip_unassigned: bool = False
+
+    def __call__(self, code_range: range) -> Iterator[int]:
+        values: Iterator[int] = iter(code_range)
+        if self.skip_surrogates:
+            values = (
+                value for value in values
+                if not FIRST_SURROGATE <= value <= LAST_SURROGATE
+            )
+        if self.skip_unassigned:
+            values = (
+                value for value in values
+                if unicodedata.category(chr(value)) != UNASSIGNED_CATEGORY
             )
+        return values
+
+
+def decode_tokens(
+    tokens: Iterable[str],
+    base: int | None,
+    on_error: DecodeErrorHandler,
+    *,
+    start: int = 0,
+    expand: RangeExpander = RangeExpander(),
+) -> Iterator[CodePoint]:
+    """
+    Decode each token into a CodePoint, deferring to `on_error` for
+    tokens that could not be decoded.  Range tokens are expanded lazily
+    with `expand` into a CodePoint per value, with the decimal value as
+    the raw string.  `start` is the index of the first token within the
+    whole input, for error reporting.
+    """
+    for index, token in enumerate(tokens, start=start):
+        try:
+            code_range = parse_code_point_range(token, base)
+            if code_range is None:
+                yield CodePoint.from_raw(token, base)
+                continue
+        except ValueError as error:
+            code = on_error(index, token, str(error))
+            if code is not None:
+                yield code
+            continue
+
+        for value in expand(code_range):
+            yield CodePoint(raw=str(value), value=value)
+
+
+def parse_plain_batch(
+    tokens: list[str],
+    base: int | None,
+    *,
+    joined: str | None = None,
+    vectorize_from: int | None = None,
+) -> array:
+    """
+    Parse a batch of tokens that are all plain, valid code points into an
+    array in one go: with a single map(int) if they are decimal, with the
+    NumPy engine if there are at least `vectorize_from` of them, and
+    with map(parse_code_point) otherwise.  `joined` can be passed if
+    "".join(tokens) is already available.
+
+    Raises:
+        ValueError: Some token isn't a plain, valid code point, so the
+        batch needs to be decoded token by token.
+        OverflowError: Some value doesn't even fit in the array.
+    """
+    if joined is None:
+        joined = "".join(tokens)
+
+    # int() would interpret C-style octal tokens (leading zero) as
+    # decimal, so leave any batch with them to the slow path.  Slice
+    # rather than index the first character since tokens can be empty.
+    if base is None and joined.isascii() and joined.isdigit() \
+            and "0" not in map(operator.itemgetter(slice(1)), tokens):
+        values = array("I", map(int, tokens))
+    elif base is not None and vectorize_from is not None \
+            and len(tokens) >= vectorize_from:
+        parsed = vectorized.parse_code_points(tokens, base)
+        if parsed is None:
+            raise ValueError("batch can't be vectorized")
+        return parsed
+    else:
+        values = array("I", map(parse_code_point,
+                                tokens,
+                                itertools.repeat(base)))
+
+    if values and max(values) >= MAX_CODE_POINT_EXCLUSIVE:
+        raise ValueError("batch has values out of range")
+    return values
 
 
-def get_codes_from_stdin(*, base: int | None = None) -> list[CodePoint]:
-    """Get code point input from stdin."""
-    tokens = sys.stdin.read().split()
-    return [CodePoint(token, base) for token in tokens]
+def decode_into_table(
+    batches: Iterable[list[str]],
+    base: int | None,
+    on_error: DecodeErrorHandler,
+    *,
+    expand: RangeExpander = RangeExpander(),
+    vectorize_from: int | None = None,
+) -> CodePointTable:
+    """
+    Decode batches of tokens into a CodePointTable.  Batches of plain
+    code points are parsed all at once with parse_plain_batch(), and
+    only batches containing anything else (ranges, errors, etc.) are
+    decoded token by token.
+    """
+    table = CodePointTable()
+    index = 0
+
+    for tokens in batches:
+        joined = "".join(tokens)
+        try:
+            values = parse_plain_batch(tokens, base, joined=joined,
+                                       vectorize_from=vectorize_from)
+        except (ValueError, OverflowError):
+            codes = decode_tokens(tokens, base, on_error,
+                                  start=index, expand=expand)
+            table.extend_codes(codes)
+        else:
+            table.extend(tokens, values, joined_tokens=joined)
+        index += len(tokens)
+
+    return table
 
 
-def escaped(ch: str, literal_spaces: bool) -> str:
+def decode_value_batches(
+    batches: Iterable[list[str]],
+    base: int | None,
+    on_error: DecodeErrorHandler,
+    *,
+    expand: RangeExpander,
+    vectorize_from: int,
+) -> Iterator[array]:
+    """
+    Decode batches of tokens into arrays of code points, parsing batches
+    of plain code points all at once with parse_plain_batch().  The rest
+    are decoded token by token, with ranges expanded lazily into arrays
+    of at most DECODED_BATCH_SIZE code points, so that memory use doesn't
+    grow with the size of the ranges.
+    """
+    index = 0
+    for tokens in batches:
+        try:
+            yield parse_plain_batch(tokens, base,
+                                    vectorize_from=vectorize_from)
+        except (ValueError, OverflowError):
+            codes = decode_tokens(tokens, base, on_error,
+                                  start=index, expand=expand)
+            values = (code.value for code in codes)
+            while chunk := array(U32_TYPECODE,
+                                 itertools.islice(values,
+                                                  DECODED_BATCH_SIZE)):
+                yield chunk
+        index += len(tokens)
+
+
+def escaped(ch: str, literal_spaces: bool, padding: str = "") -> str:
     r"""
     Return a string representation that can be safely printed without
-    messing up formatting.
+    messing up formatting.  If `padding` (spaces) is given, the result
+    is that of `ch + padding` instead, without escaping the padding.
 
     NOTE: len(escaped(ch)) may not necessarily be 1. This is true for
     characters that have an escape sequence representation like \n or
     \x1e.
     """
-    safe = repr(ch).strip("'\"")
+    # Quotes escape to nothing, so a padded quote is just its padding,
+    # which can in turn be shown as SPC.
+    safe = escape(ch) + padding
     if safe == " " and not literal_spaces:
         return "SPC"
     return safe
 
 
-def print_as_is(codes: list[CodePoint]) -> None:
+def print_as_is(codes: Iterable[CodePoint]) -> None:
     """
     Handle the simplest case, where we literally decode all the
     characters and print them side-by-side. This is useful when you're
     decoding a message and just want to see the content as it was
     originally written.
     """
-    print("".join(code.char() for code in codes))
+    for code in codes:
+        sys.stdout.write(code.char())
+    sys.stdout.write("\n")
+
 
+def print_one_per_line(
+    codes: Iterable[CodePoint],
+    annotate: Annotator | None = None,
+) -> None:
+    """
+    Handle the case where each result goes on a separate line.  If
+    `annotate` is provided, the characters are escaped so that each
+    stays on its own line, and their annotations are appended.
+    """
+    if annotate is None:
+        for code in codes:
+            print(code.char())
+        return
 
-def print_one_per_line(codes: list[CodePoint]) -> None:
-    """Handle the case where each result goes on a separate line."""
     for code in codes:
-        print(code.char())
+        print(f"{escape(code.char())}\t{annotate(code.value)}")
 
 
-def echo_one_per_line(codes: list[CodePoint]) -> None:
+def echo_one_per_line(
+    table: CodePointTable,
+    annotate: Annotator | None = None,
+) -> None:
     """
     Handle the case where each result goes on a separate line, with the
-    original string encoding echoed beside the decoded values."""
-    max_width = max(len(code.raw) for code in codes)
-    width = max(len(str(code.value)) for code in codes)
-
-    for code in codes:
-        echo_column = code.raw.ljust(max_width)
-        decoded_column = code.char().ljust(width)
-        print(f"{echo_column} {decoded_column}")
+    original string encoding echoed beside the decoded values, and the
+    annotations from `annotate` appended if provided.
+    """
+    max_width = table.max_raw_width
+    width = table.max_value_width
+
+    for raw, value in zip(table.raws(), table.values):
+        echo_column = raw.ljust(max_width)
+        if annotate is None:
+            decoded_column = chr(value).ljust(width)
+            print(f"{echo_column} {decoded_column}")
+        else:
+            decoded_column = escape(chr(value)).ljust(width)
+            print(f"{echo_column} {decoded_column}\t{annotate(value)}")
 
 
 def print_horizontally(
-    codes: list[CodePoint],
+    table: CodePointTable,
     *,
     echo: bool,
     delimiter: str,
@@ -257,29 +734,30 @@ def print_horizontally(
     """
     max_width = 0
     if echo:
-        max_width = max(len(str(code.value)) for code in codes)
+        max_width = table.max_value_width
 
     # If echoed, the first line is the echo line. The decoded values are
     # on the line below.
     if echo:
-        echo_line = delimiter.join(
-            str(code.value).ljust(max_width)
-            for code in codes
-        )
-        print(echo_line)
+        echo_line = (str(value).ljust(max_width) for value in table.values)
+        print_joined(echo_line, delimiter)
 
-    def format_char(code: CodePoint) -> str:
-        padded_char = code.char().ljust(max_width)
-        escaped_char = escaped(padded_char, use_literal_spaces)
-        return escaped_char
-
-    decoded_line = delimiter.join(format_char(code) for code in codes)
-    print(decoded_line)
+    padding = " " * (max_width - 1)
+    decoded_line = (
+        escaped(chr(value), use_literal_spaces, padding)
+        for value in table.values
+    )
+    print_joined(decoded_line, delimiter)
 
 
 def main() -> None:
     """Main driver function."""
     args = parser.parse_args()
+    if args.annotate is not None:
+        if args.print_as_is or args.delimiter != " ":
+            parser.error("--annotate prints one entry per line and cannot "
+                         "be used with --print or --delimiter")
+        args.one_per_line = True
     options = ProgramOptions(**vars(args))
 
     if options.use_hexadecimal:
@@ -291,27 +769,187 @@ def main() -> None:
     else:
         base = None
 
-    codes = [CodePoint(encoded, base) for encoded in options.code_points]
-    if not codes:
-        codes = get_codes_from_stdin(base=base)
+    if options.packed_format is not None and options.code_points:
+        parser.error("code points cannot be given as arguments with --read")
+
+    try:
+        vectorize_from = vectorized.vectorize_from(options.engine)
+    except ImportError as error:
+        parser.error(str(error))
 
     # Ignore echo, doesn't make sense to use it with --print.
     if options.echo_requested and options.print_as_is:
         print_stderr("WARNING: Ignoring --echo since --print was used.")
 
-    if options.print_as_is:
-        print_as_is(codes)
+    batches: Iterable[list[str]]
+    if options.code_points:
+        batches = [options.code_points]
+    else:
+        batches = iter_token_batches(sys.stdin)
+
+    with contextlib.ExitStack() as stack:
+        errors_file = None
+        if options.errors_path is not None:
+            errors_file = stack.enter_context(
+                options.errors_path.open("wt", encoding="utf-8"),
+            )
+        on_error = DecodeErrorHandler(options.on_error, errors_file)
+        if options.packed_format is None:
+            print_codes(batches, base, on_error, options,
+                        vectorize_from=vectorize_from)
+        else:
+            packed = read_packed(sys.stdin.buffer, options.packed_format)
+            print_packed(packed, on_error, options,
+                         vectorize_from=vectorize_from)
+
+    on_error.report()
+
+
+def print_codes(
+    batches: Iterable[list[str]],
+    base: int | None,
+    on_error: DecodeErrorHandler,
+    options: ProgramOptions,
+    *,
+    vectorize_from: int | None = None,
+) -> None:
+    """
+    Decode and print the code points in the format requested by
+    `options`.  The --print and -1 modes print each code point as soon
+    as it is decoded (or each batch, with the NumPy engine); the others
+    need all of them upfront to align the output, so they are decoded
+    into a compact CodePointTable.
+    """
+    expand = RangeExpander(skip_surrogates=options.skip_surrogates,
+                           skip_unassigned=options.skip_unassigned)
+    annotate = None
+    if options.annotate is not None:
+        annotate = Annotator(options.annotate)
+
+    streamed = options.print_as_is or \
+        options.one_per_line and not options.echo_requested
+    if streamed and vectorize_from is not None and annotate is None:
+        value_batches = decode_value_batches(batches, base, on_error,
+                                             expand=expand,
+                                             vectorize_from=vectorize_from)
+        print_text_batches(value_batches, options.print_as_is)
         return
 
-    if options.one_per_line:
-        if options.echo_requested:
-            echo_one_per_line(codes)
+    if streamed:
+        tokens = itertools.chain.from_iterable(batches)
+        codes = decode_tokens(tokens, base, on_error, expand=expand)
+        if options.print_as_is:
+            print_as_is(codes)
         else:
-            print_one_per_line(codes)
+            print_one_per_line(codes, annotate)
+        return
+
+    if options.align_window is None:
+        table = decode_into_table(batches, base, on_error, expand=expand,
+                                  vectorize_from=vectorize_from)
+        print_table(table, options, annotate)
+        return
+
+    # Each window is aligned independently, so only one window needs to
+    # be in memory at a time.  Windows are counted in code points rather
+    # than tokens since a range token can expand to any number of them.
+    tokens = itertools.chain.from_iterable(batches)
+    codes = decode_tokens(tokens, base, on_error, expand=expand)
+    while window := list(itertools.islice(codes, options.align_window)):
+        table = CodePointTable()
+        table.extend_codes(window)
+        print_table(table, options, annotate)
+
+
+def read_packed(stream: BinaryIO, packed_format: str) -> Iterator[array]:
+    """Read batches of packed code points, exiting if they're malformed."""
+    try:
+        yield from iter_unpacked(stream, packed_format)
+    except ValueError as error:
+        exit_with_error(str(error))
+
+
+def validate_packed(
+    batches: Iterable[array],
+    on_error: DecodeErrorHandler,
+) -> Iterator[array]:
+    """
+    Yield the batches of packed code points with the out of range values
+    handled by `on_error`.
+    """
+    index = 0
+    for values in batches:
+        valid = values
+        if values and max(values) >= MAX_CODE_POINT_EXCLUSIVE:
+            valid = array(U32_TYPECODE)
+            for offset, value in enumerate(values):
+                # Values are unsigned, and can be too large for chr().
+                if value < MAX_CODE_POINT_EXCLUSIVE:
+                    valid.append(value)
+                    continue
+                raw = str(value)
+                code = on_error(index + offset, raw,
+                                _out_of_range_message(value, raw))
+                if code is not None:
+                    valid.append(code.value)
+        yield valid
+        index += len(values)
+
+
+def print_packed(
+    batches: Iterable[array],
+    on_error: DecodeErrorHandler,
+    options: ProgramOptions,
+    *,
+    vectorize_from: int | None = None,
+) -> None:
+    """
+    Print code points read in a packed binary format.  The --print and
+    -1 modes convert each batch back to text in a single pass, without
+    any work per code point.  The other modes use the same path as
+    textual input, with the decimal values as the raw tokens.
+    """
+    if options.annotate is None and (options.print_as_is or
+                                     options.one_per_line
+                                     and not options.echo_requested):
+        print_text_batches(validate_packed(batches, on_error),
+                           options.print_as_is)
+        return
+
+    token_batches = (list(map(str, values)) for values in batches)
+    print_codes(token_batches, None, on_error, options,
+                vectorize_from=vectorize_from)
+
+
+def print_text_batches(batches: Iterable[array], print_as_is: bool) -> None:
+    """
+    Print batches of valid code points as their characters, side by side
+    if `print_as_is` and one per line otherwise.  Each batch is converted
+    back to text in a single pass, without any work per code point.
+    """
+    separator = "" if print_as_is else "\n"
+    for values in batches:
+        text = code_points_to_text(values)
+        if text and separator:
+            sys.stdout.write(separator.join(text) + separator)
+        else:
+            sys.stdout.write(text)
+    if print_as_is:
+        sys.stdout.write("\n")
+
+
+def print_table(
+    table: CodePointTable,
+    options: ProgramOptions,
+    annotate: Annotator | None = None,
+) -> None:
+    """Print code points that need to be aligned with each other."""
+    if options.one_per_line:
+        echo_one_per_line(table, annotate)
         return
 
     print_horizontally(
-        codes,
+        table,
         echo=options.echo_requested,
         delimiter=options.delimiter,
         use_literal_spaces=options.use_literal_spaces
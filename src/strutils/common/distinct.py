@@ -0,0 +1,100 @@
+import hashlib
+from array import array
+from typing import Final
+
+# Up to this many strings are remembered exactly.  Beyond that, only a
+# 64-bit fingerprint of each is, in a compact open-addressing table.
+EXACT_LIMIT: Final = 1 << 20
+
+# Array typecode for unsigned 64-bit integers.
+_U64_TYPECODE: Final = "Q"
+
+
+class ExactSet:
+    """Set of strings that filters out those it has already seen."""
+
+    def __init__(self) -> None:
+        self._strings: set[str] = set()
+
+    def filter_new(self, strings: list[str]) -> list[str]:
+        """
+        Return the strings not seen before (including earlier in
+        `strings`) in order, and remember them.
+        """
+        seen = self._strings
+        new = []
+        for string in strings:
+            if string not in seen:
+                seen.add(string)
+                new.append(string)
+        return new
+
+
+class FingerprintSet:
+    """
+    Like ExactSet, but only remembers a 64-bit fingerprint of each
+    string, in a linear-probing hash table of 8 bytes per slot (about
+    16 bytes per string) instead of the string itself.
+
+    Two different strings can share a fingerprint, so a new string is
+    very rarely taken as seen, but never the other way around.  When
+    used to reject duplicates, that only costs an extra draw now and
+    then, and no duplicate ever gets through.  Fingerprints don't depend
+    on the process (unlike hash()), so neither do the rejections.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self._slots = array(_U64_TYPECODE)
+        self._count = 0
+        self._reserve(capacity)
+
+    def filter_new(self, strings: list[str]) -> list[str]:
+        """
+        Return the strings not seen before (including earlier in
+        `strings`) in order, and remember them.
+        """
+        self._reserve(self._count + len(strings))
+        slots = self._slots
+        mask = len(slots) - 1
+        blake2b = hashlib.blake2b
+        from_bytes = int.from_bytes
+        new = []
+        for string in strings:
+            digest = blake2b(string.encode("utf-8", "surrogatepass"),
+                             digest_size=8).digest()
+            # 0 marks an empty slot.
+            fingerprint = from_bytes(digest, "little") or 1
+            index = fingerprint & mask
+            while (slot := slots[index]) != fingerprint:
+                if slot == 0:
+                    slots[index] = fingerprint
+                    new.append(string)
+                    break
+                index = (index + 1) & mask
+        self._count += len(new)
+        return new
+
+    def _reserve(self, count: int) -> None:
+        # Keep the table at most half full so that probes stay short.
+        if 2 * count <= len(self._slots):
+            return
+        old_slots = self._slots
+        size = 1 << (2 * count - 1).bit_length()
+        slots = self._slots = array(_U64_TYPECODE, bytes(8 * size))
+        mask = size - 1
+        for fingerprint in old_slots:
+            if fingerprint:
+                index = fingerprint & mask
+                while slots[index]:
+                    index = (index + 1) & mask
+                slots[index] = fingerprint
+
+
+def distinct_set(expected_count: int) -> ExactSet | FingerprintSet:
+    """
+    Return the set best suited to reject duplicates among about
+    `expected_count` strings.
+    """
+    if expected_count <= EXACT_LIMIT:
+        return ExactSet()
+    return FingerprintSet(expected_count)
@@ -0,0 +1,40 @@
+from typing import Final
+
+# Cap on the number of characters outside Latin-1 to remember escapes
+# for, so that input covering a large part of Unicode can't grow the
+# cache without bound.
+MAX_CACHED_ESCAPES: Final = 1 << 13
+
+
+def _repr_escape(ch: str) -> str:
+    return repr(ch).strip("'\"")
+
+
+# Escapes of all ASCII and Latin-1 characters, computed upfront.
+LATIN_1_ESCAPES: Final = {
+    chr(code): _repr_escape(chr(code)) for code in range(0x100)
+}
+
+_escapes = dict(LATIN_1_ESCAPES)
+
+
+def escape(ch: str) -> str:
+    r"""
+    Return repr(ch) with the surrounding quotes stripped, such that the
+    character can be printed without messing up formatting (e.g. "\n"
+    becomes "\\n").  Note that the quote characters themselves escape to
+    the empty string since they are stripped as well.
+
+    Escapes for Latin-1 are precomputed, and those for the rest of the
+    BMP are cached (up to a limit) as they are requested.
+    """
+    try:
+        return _escapes[ch]
+    except KeyError:
+        pass
+
+    safe = _repr_escape(ch)
+    if ord(ch) <= 0xFFFF and \
+            len(_escapes) < len(LATIN_1_ESCAPES) + MAX_CACHED_ESCAPES:
+        _escapes[ch] = safe
+    return safe
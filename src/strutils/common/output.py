@@ -1,7 +1,8 @@
 import functools
+import itertools
 import sys
 from pathlib import Path
-from typing import Final, NoReturn
+from typing import Final, Iterable, NoReturn
 
 PROG: Final = Path(sys.argv[0]).name
 
@@ -20,3 +21,22 @@ def exit_with_error(message: str, *, code: int = 1) -> NoReturn:
     assert code > 0, "error exit code must be a positive integer"
     print(f"{PROG}: error: {message}", file=sys.stderr)
     sys.exit(code)
+
+
+def print_joined(
+    pieces: Iterable[str],
+    delimiter: str,
+    *,
+    batch_size: int = 1 << 14,
+) -> None:
+    """
+    Equivalent to print(delimiter.join(pieces)), but without building
+    the whole line in memory at once.
+    """
+    iterator = iter(pieces)
+    separator = ""
+    while batch := list(itertools.islice(iterator, batch_size)):
+        sys.stdout.write(separator)
+        sys.stdout.write(delimiter.join(batch))
+        separator = delimiter
+    sys.stdout.write("\n")
@@ -0,0 +1,158 @@
+import codecs
+import sys
+from array import array
+from typing import BinaryIO, Final, Iterator
+
+from .streaming import DEFAULT_CHUNK_SIZE
+
+# Each code point as an unsigned 32-bit little-endian integer.
+FORMAT_U32LE: Final = "u32le"
+# UTF-16LE code units (characters beyond the BMP take a surrogate pair).
+FORMAT_U16LE: Final = "u16le"
+# Each code point as an unsigned LEB128 integer, so ASCII is unchanged.
+FORMAT_VARINT: Final = "varint"
+
+PACKED_FORMATS: Final = (FORMAT_U32LE, FORMAT_U16LE, FORMAT_VARINT)
+
+# Array typecode for unsigned 32-bit integers on all common platforms.
+U32_TYPECODE: Final = "I"
+
+# Codec that maps between text and the native layout of a U32 array.
+_NATIVE_UTF_32: Final = f"utf-32-{'le' if sys.byteorder == 'little' else 'be'}"
+
+
+class _VarintTable(dict[int, str]):
+    """
+    str.translate() table from code point to its varint, with each byte
+    represented by the Latin-1 character of the same value.
+    """
+
+    def __missing__(self, code: int) -> str:
+        encoded = bytearray()
+        while code >= 0x80:
+            encoded.append(code & 0x7F | 0x80)
+            code >>= 7
+        encoded.append(code)
+        self[code] = value = encoded.decode("latin-1")
+        return value
+
+
+_varint_table = _VarintTable()
+
+
+def pack(text: str, packed_format: str) -> bytes:
+    """Encode the code points of `text` in the given packed format."""
+    if packed_format == FORMAT_U32LE:
+        return text.encode("utf-32-le", "surrogatepass")
+    if packed_format == FORMAT_U16LE:
+        return text.encode("utf-16-le", "surrogatepass")
+    if packed_format == FORMAT_VARINT:
+        if text.isascii():
+            return text.encode("ascii")
+        return text.translate(_varint_table).encode("latin-1")
+    raise ValueError(f"unknown packed format {packed_format!r}")
+
+
+def iter_unpacked(
+    stream: BinaryIO,
+    packed_format: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[array]:
+    """
+    Decode the packed code points from `stream` a chunk at a time, as
+    arrays of unsigned 32-bit integers.  The values are not validated,
+    so they may be out of the range of valid code points.
+
+    Raises:
+        ValueError: The stream ended in the middle of a code point.
+    """
+    if packed_format == FORMAT_U32LE:
+        chunks = _iter_u32le(stream, chunk_size)
+    elif packed_format == FORMAT_U16LE:
+        chunks = _iter_u16le(stream, chunk_size)
+    elif packed_format == FORMAT_VARINT:
+        chunks = _iter_varint(stream, chunk_size)
+    else:
+        raise ValueError(f"unknown packed format {packed_format!r}")
+
+    for values in chunks:
+        if values:
+            yield values
+
+
+def code_points_to_text(values: array) -> str:
+    """
+    Convert an array of unsigned 32-bit code points back to text in one
+    pass.  All values must be in `range(0x110000)`.
+    """
+    return values.tobytes().decode(_NATIVE_UTF_32, "surrogatepass")
+
+
+def _iter_u32le(stream: BinaryIO, chunk_size: int) -> Iterator[array]:
+    carry = b""
+    # Keep chunks a multiple of the item size to avoid copying.
+    while data := stream.read(chunk_size * 4):
+        data = carry + data
+        complete_length = len(data) - len(data) % 4
+        values = array(U32_TYPECODE)
+        values.frombytes(data[:complete_length])
+        if sys.byteorder == "big":
+            values.byteswap()
+        carry = data[complete_length:]
+        yield values
+    if carry:
+        raise ValueError("input ended in the middle of a u32le code point")
+
+
+def _iter_u16le(stream: BinaryIO, chunk_size: int) -> Iterator[array]:
+    # The incremental decoder takes care of surrogate pairs and units
+    # that are split across chunks.
+    decoder = codecs.getincrementaldecoder("utf-16-le")("surrogatepass")
+    while data := stream.read(chunk_size * 2):
+        yield _text_to_code_points(decoder.decode(data))
+    try:
+        yield _text_to_code_points(decoder.decode(b"", final=True))
+    except UnicodeDecodeError:
+        raise ValueError(
+            "input ended in the middle of a u16le code unit",
+        ) from None
+
+
+def _iter_varint(stream: BinaryIO, chunk_size: int) -> Iterator[array]:
+    carry = b""
+    while data := stream.read(chunk_size):
+        data = carry + data
+        # Bytes after the last terminating byte (high bit unset) belong
+        # to a varint that continues in the next chunk.
+        end = len(data)
+        while end > 0 and data[end - 1] & 0x80:
+            end -= 1
+        carry = data[end:]
+        yield _decode_varints(data[:end])
+    if carry:
+        raise ValueError("input ended in the middle of a varint code point")
+
+
+def _decode_varints(data: bytes) -> array:
+    # Fast path: every varint is a single byte.
+    if data.isascii():
+        return array(U32_TYPECODE, data)
+
+    values = array(U32_TYPECODE)
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            # Clamp malformed varints that don't fit in 32 bits. They are
+            # out of range for code points anyway.
+            values.append(min(value, 0xFFFFFFFF))
+            value = shift = 0
+    return values
+
+
+def _text_to_code_points(text: str) -> array:
+    values = array(U32_TYPECODE)
+    values.frombytes(text.encode(_NATIVE_UTF_32, "surrogatepass"))
+    return values
@@ -0,0 +1,27 @@
+import collections
+from concurrent.futures import Executor, Future
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_bounded(
+    executor: Executor,
+    function: Callable[[T], R],
+    items: Iterable[T],
+    max_pending: int,
+) -> Iterator[R]:
+    """
+    Like executor.map(function, items), but only take the next item from
+    `items` once fewer than `max_pending` calls are in flight, so that a
+    lazy stream of items is never read much ahead of the results being
+    consumed.  Results are yielded in order.
+    """
+    pending: collections.deque[Future[R]] = collections.deque()
+    for item in items:
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+        pending.append(executor.submit(function, item))
+    while pending:
+        yield pending.popleft().result()
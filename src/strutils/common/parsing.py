@@ -1,5 +1,6 @@
 import argparse
 from pathlib import Path
+from typing import Callable, Sequence
 
 from .. import __author__, __version__
 
@@ -41,6 +42,37 @@ def non_negative_int(value: str) -> int:
         ) from None
 
 
+def positive_int(value: str) -> int:
+    try:
+        num = int(value)
+        if num <= 0:
+            raise ValueError
+        return num
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"expected positive integer, received {value!r}",
+        ) from None
+
+
+def comma_separated_choices(
+    choices: Sequence[str],
+) -> Callable[[str], list[str]]:
+    """
+    Return an argparse type that parses a comma-separated list of values,
+    each of which must be one of `choices`.
+    """
+    def parse(value: str) -> list[str]:
+        values = value.split(",")
+        for item in values:
+            if item not in choices:
+                raise argparse.ArgumentTypeError(
+                    f"invalid choice {item!r} in {value!r} "
+                    f"(choose from {', '.join(choices)})",
+                )
+        return values
+    return parse
+
+
 def valid_regular_file_path(value: str) -> Path:
     path = Path(value)
     if not path.exists():
@@ -0,0 +1,193 @@
+import hashlib
+import math
+import os
+import random
+from abc import ABC, abstractmethod
+from array import array
+from typing import Callable, Final, Generic, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# Number of characters a PooledSampler draws at a time.
+POOL_SIZE: Final = 1 << 16
+
+# Array typecode for unsigned 64-bit integers.
+_U64_TYPECODE: Final = "Q"
+
+_2_POW_MINUS_53: Final = 2.0 ** -53
+
+
+class AliasTable(Generic[T]):
+    """
+    Walker's alias method (as laid out by Vose) for weighted sampling
+    with replacement in O(1) per item, however many items there are.
+
+    The population is split into as many equally likely slots as there
+    are items.  Each slot holds its own item with some probability and
+    an "alias" (one of the heavier items) otherwise, so a single uniform
+    random number picks both the slot and the side of it.  Unlike
+    random.choices(), nothing needs to be bisected per item drawn, nor
+    are cumulative weights recomputed per call.
+    """
+
+    def __init__(self, population: Sequence[T], weights: Sequence[float]):
+        if len(population) != len(weights):
+            raise ValueError("the number of weights does not match "
+                             "the population")
+        total = sum(weights)
+        if not population or total <= 0:
+            raise ValueError("total of weights must be greater than zero")
+
+        size = len(population)
+        scaled = [weight * size / total for weight in weights]
+        aliases = list(range(size))
+        # Probability of keeping the slot's own item, offset by the index
+        # of the slot: random() * size lands in slot int(u), and keeps
+        # its item if u is below the threshold.
+        thresholds = [index + 1.0 for index in range(size)]
+
+        small = [index for index, weight in enumerate(scaled) if weight < 1]
+        large = [index for index, weight in enumerate(scaled) if weight >= 1]
+        while small and large:
+            lighter = small.pop()
+            heavier = large[-1]
+            thresholds[lighter] = lighter + scaled[lighter]
+            aliases[lighter] = heavier
+            scaled[heavier] += scaled[lighter] - 1
+            if scaled[heavier] < 1:
+                small.append(large.pop())
+        # Anything left over is only off from 1 by rounding errors, so it
+        # always keeps its own item (thresholds are already index + 1).
+
+        self.size = size
+        self.heads = list(population)
+        self.tails = [population[alias] for alias in aliases]
+        self.thresholds = thresholds
+
+    def choices(
+        self,
+        k: int,
+        random: Callable[[], float] = random.random,
+    ) -> list[T]:
+        """
+        Return a `k` sized list of items chosen with replacement, with
+        each item drawn in proportion to its weight.
+        """
+        size = self.size
+        heads = self.heads
+        tails = self.tails
+        thresholds = self.thresholds
+        return [
+            heads[slot] if u < thresholds[slot] else tails[slot]
+            for u in [random() * size for _ in range(k)]
+            for slot in (int(u),)
+        ]
+
+
+def derive_seed(seed: int, *keys: int) -> int:
+    """
+    Derive a 128-bit seed from `seed` and a path of `keys` (such as the
+    index of a block), in the spirit of NumPy's SeedSequence.spawn().
+    Random generators seeded with different paths are independent for
+    all practical purposes, and the result is the same on any platform.
+    """
+    message = ",".join(map(str, (seed, *keys))).encode("ascii")
+    digest = hashlib.blake2b(message, digest_size=16).digest()
+    return int.from_bytes(digest, "little")
+
+
+class PooledSampler(ABC):
+    """
+    Base for samplers of characters with replacement that are much
+    cheaper per character in bulk: characters are drawn POOL_SIZE at a
+    time with _draw() and handed out from the pool, so that drawing many
+    short strings costs about the same as one long one.
+    """
+
+    def __init__(self) -> None:
+        self._pool = ""
+        self._position = 0
+
+    def choices(self, k: int) -> str:
+        """Return a string of `k` characters chosen with replacement."""
+        end = self._position + k
+        if end > len(self._pool):
+            remainder = self._pool[self._position:]
+            self._pool = remainder + self._draw(
+                max(k - len(remainder), POOL_SIZE),
+            )
+            self._position = 0
+            end = k
+        chars = self._pool[self._position:end]
+        self._position = end
+        return chars
+
+    @abstractmethod
+    def _draw(self, k: int) -> str:
+        """Draw a string of `k` characters with replacement."""
+
+
+class SecureSampler(PooledSampler):
+    """
+    Weighted sampling of characters with replacement from the operating
+    system's cryptographically secure source, os.urandom(), which is
+    read in large pools rather than once per string.
+
+    If the weights add up to at most 256, each random byte picks an
+    entry of the alphabet expanded by its weights (each character
+    repeated as many times as its weight) with a bytes.translate()
+    table.  Bytes past the largest multiple of the expanded size are
+    deleted, so that every entry is exactly equally likely (rejection
+    sampling).  Weights are reduced by their greatest common divisor
+    first.  Otherwise, each character is drawn from an alias table
+    with a uniform float made from 53 random bits.
+    """
+
+    def __init__(self, charset: str, weights: Sequence[int]) -> None:
+        super().__init__()
+        # Weights only matter relative to each other, and the smaller the
+        # expanded alphabet is, the more likely it fits in a byte.
+        divisor = math.gcd(*weights)
+        expanded = "".join(ch * (weight // divisor)
+                           for ch, weight in zip(charset, weights))
+        self._byte_table: bytes | None = None
+        self._char_table: list[str] | None = None
+        self._alias_table: AliasTable[str] | None = None
+        if 0 < len(expanded) <= 0x100:
+            accepted = 0x100 - 0x100 % len(expanded)
+            chars = [expanded[byte % len(expanded)]
+                     for byte in range(accepted)]
+            self._rejected = bytes(range(accepted, 0x100))
+            if all(ord(ch) < 0x100 for ch in chars):
+                # Translate random bytes straight to Latin-1 characters.
+                self._byte_table = bytes(map(ord, chars)).ljust(0x100, b"\0")
+            else:
+                self._char_table = chars
+        else:
+            self._alias_table = AliasTable(charset, weights)
+
+    def _draw(self, k: int) -> str:
+        if self._alias_table is not None:
+            return "".join(self._alias_table.choices(
+                k, iter(_secure_floats(k)).__next__,
+            ))
+
+        drawn = ""
+        while len(drawn) < k:
+            # Draw a little extra to make up for the rejected bytes.
+            data = os.urandom(k - len(drawn) + (k >> 3) + 64)
+            if self._byte_table is not None:
+                drawn += data.translate(self._byte_table,
+                                        self._rejected).decode("latin-1")
+            else:
+                drawn += "".join(map(
+                    self._char_table.__getitem__,
+                    data.translate(None, self._rejected),
+                ))
+        return drawn[:k]
+
+
+def _secure_floats(k: int) -> list[float]:
+    values = array(_U64_TYPECODE, os.urandom(8 * k))
+    # Like random.random(): 53 random bits scaled into [0.0, 1.0).
+    return [(value >> 11) * _2_POW_MINUS_53 for value in values]
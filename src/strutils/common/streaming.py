@@ -0,0 +1,151 @@
+import codecs
+import io
+from typing import AnyStr, Final, Iterable, Iterator, TextIO
+
+# Number of characters to process at a time when consuming a stream.
+DEFAULT_CHUNK_SIZE: Final = 1 << 16
+
+
+def iter_text_chunks(
+    stream: TextIO,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[str]:
+    """
+    Yield the contents of `stream` in chunks of at most about
+    `chunk_size` characters.  Unlike stream.read(chunk_size), a chunk is
+    yielded as soon as any input is available instead of blocking until
+    the chunk is full, keeping the latency of pipelines low.
+    """
+    buffer = getattr(stream, "buffer", None)
+    if not hasattr(buffer, "read1"):
+        while chunk := stream.read(chunk_size):
+            yield chunk
+        return
+
+    # Translate newlines the same way the text layer would have.
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder(stream.encoding)(stream.errors),
+        translate=True,
+    )
+    while data := buffer.read1(chunk_size):
+        if chunk := decoder.decode(data):
+            yield chunk
+    if tail := decoder.decode(b"", final=True):
+        yield tail
+
+
+def iter_tokens(
+    stream: TextIO,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[str]:
+    """
+    Lazily tokenize the contents of `stream` according to the rule of
+    str.split(), without ever holding more than a chunk in memory.
+    """
+    for batch in iter_token_batches(stream, chunk_size):
+        yield from batch
+
+
+def iter_token_batches(
+    stream: TextIO,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[list[str]]:
+    """
+    Like iter_tokens(), but yield the tokens a chunk at a time so that
+    they can be processed in batches.
+    """
+    carry = ""
+    for chunk in iter_text_chunks(stream, chunk_size):
+        complete, carry = split_after_last_separator(carry + chunk)
+        if batch := complete.split():
+            yield batch
+    if batch := carry.split():
+        yield batch
+
+
+def iter_fixed_windows(
+    chunks: Iterable[AnyStr],
+    size: int,
+) -> Iterator[AnyStr]:
+    """
+    Re-chunk `chunks` into windows of exactly `size` characters (or
+    bytes), except for the last window, which may be shorter.
+    """
+    carry: AnyStr | None = None
+    for chunk in chunks:
+        buffer = chunk if carry is None else carry + chunk
+        full_length = len(buffer) - len(buffer) % size
+        for start in range(0, full_length, size):
+            yield buffer[start:start + size]
+        carry = buffer[full_length:]
+    if carry:
+        yield carry
+
+
+def slice_chunks(
+    chunks: Iterable[AnyStr],
+    start: int,
+    stop: int | None = None,
+) -> Iterator[AnyStr]:
+    """
+    Yield the part of the concatenation of `chunks` from index `start`
+    up to `stop` (like slicing it), without concatenating them.
+    """
+    offset = 0
+    for chunk in chunks:
+        if stop is not None and offset >= stop:
+            return
+        end = offset + len(chunk)
+        if end > start:
+            yield chunk[max(start - offset, 0):
+                        None if stop is None else stop - offset]
+        offset = end
+
+
+def split_after_last_separator(
+    buffer: str,
+    separator: str | None = None,
+) -> tuple[str, str]:
+    """
+    Split `buffer` into a complete part, ending with the last occurrence
+    of `separator`, and the incomplete remainder after it. If separator
+    is None, any whitespace character counts as a separator (same as
+    str.split()).
+
+    This is used to carry a partial token over to the next chunk of a
+    stream so that no token is ever processed in two pieces.
+    """
+    if separator is not None:
+        index = buffer.rfind(separator)
+        if index == -1:
+            return "", buffer
+        index += len(separator)
+        return buffer[:index], buffer[index:]
+
+    if not buffer or buffer[-1].isspace():
+        return buffer, ""
+    # rsplit() finds the last token from the end in C, instead of
+    # checking every character of a long token in Python.
+    last_token = buffer.rsplit(maxsplit=1)[-1]
+    index = len(buffer) - len(last_token)
+    return buffer[:index], buffer[index:]
+
+
+def split_complete_lines(buffer: str) -> tuple[list[str], str]:
+    """
+    Split `buffer` into its complete lines (line endings removed, using
+    the same boundaries as str.splitlines()) and the incomplete remainder
+    after the last line boundary.
+
+    A trailing carriage return is treated as incomplete since it may be
+    the first half of a CRLF split across two chunks.
+    """
+    lines = buffer.splitlines(keepends=True)
+    remainder = ""
+    if lines and (lines[-1].endswith("\r") or not _ends_line(lines[-1])):
+        remainder = lines.pop()
+    return [line.splitlines()[0] for line in lines], remainder
+
+
+def _ends_line(line: str) -> bool:
+    return line.splitlines(keepends=False)[0] != line
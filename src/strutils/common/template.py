@@ -0,0 +1,350 @@
+"""
+Templates for random strings with a small regex-like grammar, such as
+`[A-Z]{3}-[0-9]{4}` for IDs like `QZB-4096`:
+
+    - `[...]` : one character of a class, made of single characters and
+      ranges like `A-Z` (a literal `-` goes first or last)
+    - `.` : one character of a default alphabet, supplied by the caller
+    - `{N}`, `{M,N}`, `?` : repeat the previous item exactly N times,
+      between M and N times, or 0 or 1 times
+    - `(...)` : a group, with `|` to choose one of its alternatives
+      (equally likely); `|` also works at the top level
+    - `\\` : take the next character literally, e.g. `\\.` or `\\{`
+    - anything else is literal
+
+A template is compiled once into a tree of nodes that generate strings
+in batches: each class draws the characters for the whole batch in one
+call to its sampler, which is shared by all occurrences of the class.
+
+Nodes can also estimate how many different strings they generate, and
+how likely two of their strings are to be the same, for callers that
+need distinct strings.  Both treat strings made from different choices
+as different, so they're upper and lower bounds, respectively.
+"""
+
+import math
+import random
+from abc import ABC, abstractmethod
+from typing import Callable, Final, NoReturn
+
+# Draws a string of `k` characters with replacement.
+Sampler = Callable[[int], str]
+
+# Counts of possible strings are capped at this, beyond which they're
+# only ever compared with counts of strings to generate.
+MAX_STRING_COUNT: Final = 1 << 64
+
+
+class Node(ABC):
+    """Part of a compiled template."""
+
+    @abstractmethod
+    def generate(self, count: int) -> list[str]:
+        """Generate `count` independent strings of this part."""
+
+    @abstractmethod
+    def count_strings(self) -> int:
+        """
+        Return the number of possible strings of this part, capped at
+        MAX_STRING_COUNT.
+        """
+
+    @abstractmethod
+    def collision_probability(self) -> float:
+        """
+        Return the probability that two independent strings of this
+        part are the same.
+        """
+
+
+class Literal(Node):
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def generate(self, count: int) -> list[str]:
+        return [self.text] * count
+
+    def count_strings(self) -> int:
+        return 1
+
+    def collision_probability(self) -> float:
+        return 1.0
+
+
+class CharClass(Node):
+    def __init__(self, sampler: Sampler, size: int,
+                 same_char_probability: float) -> None:
+        self.sampler = sampler
+        self.size = size
+        self.same_char_probability = same_char_probability
+
+    def generate(self, count: int) -> list[str]:
+        return list(self.sampler(count))
+
+    def count_strings(self) -> int:
+        return min(self.size, MAX_STRING_COUNT)
+
+    def collision_probability(self) -> float:
+        return self.same_char_probability
+
+    def generate_runs(self, lengths: list[int]) -> list[str]:
+        """Generate a run of characters for each of `lengths`."""
+        chars = self.sampler(sum(lengths))
+        runs = []
+        end = 0
+        for length in lengths:
+            runs.append(chars[end:end + length])
+            end += length
+        return runs
+
+
+class Repeat(Node):
+    def __init__(self, node: Node, low: int, high: int) -> None:
+        self.node = node
+        self.low = low
+        self.high = high
+
+    def generate(self, count: int) -> list[str]:
+        if self.low == self.high and isinstance(self.node, CharClass):
+            # Every run is of the same length, so just cut them out.
+            length = self.low
+            if length == 0:
+                return [""] * count
+            chars = self.node.sampler(count * length)
+            return [chars[start:start + length]
+                    for start in range(0, count * length, length)]
+
+        lengths = random.choices(range(self.low, self.high + 1), k=count)
+        if isinstance(self.node, CharClass):
+            return self.node.generate_runs(lengths)
+
+        items = self.node.generate(sum(lengths))
+        strings = []
+        end = 0
+        for length in lengths:
+            strings.append("".join(items[end:end + length]))
+            end += length
+        return strings
+
+    def count_strings(self) -> int:
+        base = self.node.count_strings()
+        if base == 1:
+            return min(self.high - self.low + 1, MAX_STRING_COUNT)
+        total = 0
+        for length in range(self.low, self.high + 1):
+            # Don't compute huge powers: base ** length is at least
+            # 2 ** ((bits of base - 1) * length).
+            if (base.bit_length() - 1) * length \
+                    >= MAX_STRING_COUNT.bit_length():
+                return MAX_STRING_COUNT
+            total += base ** length
+            if total >= MAX_STRING_COUNT:
+                return MAX_STRING_COUNT
+        return total
+
+    def collision_probability(self) -> float:
+        # Both strings repeat the same number of times with probability
+        # 1 / lengths, and each repeat is the same with probability q.
+        lengths = self.high - self.low + 1
+        q = self.node.collision_probability()
+        if q == 1:
+            return 1 / lengths
+        # Geometric series of q ** length.
+        same_runs = q ** self.low * (1 - q ** lengths) / (1 - q)
+        return same_runs / (lengths * lengths)
+
+
+class Concatenation(Node):
+    def __init__(self, nodes: list[Node]) -> None:
+        self.nodes = nodes
+
+    def generate(self, count: int) -> list[str]:
+        columns = [node.generate(count) for node in self.nodes]
+        if len(columns) == 1:
+            return columns[0]
+        return list(map("".join, zip(*columns)))
+
+    def count_strings(self) -> int:
+        total = 1
+        for node in self.nodes:
+            total = min(total * node.count_strings(), MAX_STRING_COUNT)
+        return total
+
+    def collision_probability(self) -> float:
+        return math.prod(node.collision_probability() for node in self.nodes)
+
+
+class Alternation(Node):
+    def __init__(self, branches: list[Node]) -> None:
+        self.branches = branches
+
+    def generate(self, count: int) -> list[str]:
+        picks = random.choices(range(len(self.branches)), k=count)
+        # Generate each branch only as many times as it was picked.
+        generated = [
+            iter(branch.generate(picks.count(index)))
+            for index, branch in enumerate(self.branches)
+        ]
+        return [next(generated[pick]) for pick in picks]
+
+    def count_strings(self) -> int:
+        return min(sum(branch.count_strings() for branch in self.branches),
+                   MAX_STRING_COUNT)
+
+    def collision_probability(self) -> float:
+        # Both strings take the same branch with probability 1 / n**2.
+        return sum(branch.collision_probability()
+                   for branch in self.branches) / len(self.branches) ** 2
+
+
+def compile_template(template: str, default_class: CharClass) -> Node:
+    """
+    Compile `template` into a Node, with `default_class` for `.`.
+
+    Raises:
+        ValueError: The template is malformed.
+    """
+    parser = _TemplateParser(template, default_class)
+    node = parser.parse_alternation()
+    if parser.position < len(template):
+        raise ValueError(
+            f"unbalanced ')' at index {parser.position} of {template!r}",
+        )
+    return node
+
+
+class _TemplateParser:
+    def __init__(self, template: str, default_class: CharClass) -> None:
+        self.template = template
+        self.position = 0
+        self.default_class = default_class
+        # One sampler per distinct class, however often it appears.
+        self.classes: dict[str, CharClass] = {}
+
+    def parse_alternation(self) -> Node:
+        branches = [self.parse_concatenation()]
+        while self._peek() == "|":
+            self.position += 1
+            branches.append(self.parse_concatenation())
+        return branches[0] if len(branches) == 1 else Alternation(branches)
+
+    def parse_concatenation(self) -> Node:
+        nodes: list[Node] = []
+        while (ch := self._peek()) is not None and ch not in "|)":
+            node = self.parse_atom()
+            nodes.append(self.parse_repeats(node))
+
+        # Merge consecutive literals, which are common in templates.
+        merged: list[Node] = []
+        for node in nodes:
+            if isinstance(node, Literal) and merged \
+                    and isinstance(merged[-1], Literal):
+                merged[-1] = Literal(merged[-1].text + node.text)
+            else:
+                merged.append(node)
+        if not merged:
+            return Literal("")
+        return merged[0] if len(merged) == 1 else Concatenation(merged)
+
+    def parse_atom(self) -> Node:
+        ch = self.template[self.position]
+        self.position += 1
+        if ch == "\\":
+            return Literal(self._take_escaped())
+        if ch == ".":
+            return self.default_class
+        if ch == "[":
+            return self.parse_class()
+        if ch == "(":
+            node = self.parse_alternation()
+            if self._peek() != ")":
+                self._error("unterminated group")
+            self.position += 1
+            return node
+        if ch in "]{}?":
+            self.position -= 1
+            self._error(f"unexpected {ch!r}")
+        return Literal(ch)
+
+    def parse_class(self) -> Node:
+        start = self.position - 1
+        chars: list[str] = []
+        while (ch := self._peek()) != "]":
+            if ch is None:
+                self.position = start
+                self._error("unterminated character class")
+            self.position += 1
+            if ch == "\\":
+                ch = self._take_escaped()
+            # A range, unless the "-" is the last character of the class.
+            if self._peek() == "-" and self._peek(1) not in ("]", None):
+                self.position += 1
+                last = self.template[self.position]
+                self.position += 1
+                if last == "\\":
+                    last = self._take_escaped()
+                if ord(last) < ord(ch):
+                    self._error(f"reversed range {ch}-{last}")
+                chars.extend(map(chr, range(ord(ch), ord(last) + 1)))
+            else:
+                chars.append(ch)
+        self.position += 1
+
+        # Sort to ensure determinism, like resolved flags in randstr.
+        charset = "".join(sorted(set(chars)))
+        if not charset:
+            self.position = start
+            self._error("empty character class")
+        if charset not in self.classes:
+            self.classes[charset] = CharClass(
+                lambda k, charset=charset: "".join(random.choices(charset,
+                                                                  k=k)),
+                size=len(charset),
+                same_char_probability=1 / len(charset),
+            )
+        return self.classes[charset]
+
+    def parse_repeats(self, node: Node) -> Node:
+        while (ch := self._peek()) in ("{", "?"):
+            self.position += 1
+            if ch == "?":
+                node = Repeat(node, 0, 1)
+                continue
+            end = self.template.find("}", self.position)
+            if end == -1:
+                self.position -= 1
+                self._error("unterminated repeat")
+            body = self.template[self.position:end]
+            low_text, comma, high_text = body.partition(",")
+            if not _is_number(low_text) \
+                    or (comma and not _is_number(high_text)):
+                self._error(f"invalid repeat {{{body}}}")
+            low = int(low_text)
+            high = int(high_text) if comma else low
+            if low > high:
+                self._error(f"reversed repeat {{{body}}}")
+            self.position = end + 1
+            node = Repeat(node, low, high)
+        return node
+
+    def _take_escaped(self) -> str:
+        if self.position >= len(self.template):
+            self._error("trailing backslash")
+        ch = self.template[self.position]
+        self.position += 1
+        return ch
+
+    def _peek(self, offset: int = 0) -> str | None:
+        index = self.position + offset
+        if index < len(self.template):
+            return self.template[index]
+        return None
+
+    def _error(self, message: str) -> NoReturn:
+        raise ValueError(
+            f"{message} at index {self.position} of {self.template!r}",
+        )
+
+
+def _is_number(text: str) -> bool:
+    return text.isascii() and text.isdigit()
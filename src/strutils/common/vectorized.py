@@ -0,0 +1,270 @@
+"""
+Optional NumPy engine for the per-character work of ord and chr, for
+large inputs, and for the random generation of randstr.  NumPy is
+installed with the `numpy` extra::
+
+    pip install "strutils[numpy]"
+
+Every function for ord and chr returns None when it can't produce
+exactly the same result as the pure-Python path, in which case callers
+fall back to it.  The characters randstr draws with NumPy are of course
+different from those drawn with `random`.
+"""
+
+import collections
+from array import array
+from typing import TYPE_CHECKING, Final, Sequence
+
+from .sampling import PooledSampler
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+ENGINE_AUTO: Final = "auto"
+ENGINE_PYTHON: Final = "python"
+ENGINE_NUMPY: Final = "numpy"
+
+ENGINES: Final = (ENGINE_AUTO, ENGINE_PYTHON, ENGINE_NUMPY)
+
+# Batches smaller than this many characters (or tokens) are left to the
+# pure-Python path with the auto engine, since converting them to and
+# from arrays would cost more than it saves.
+AUTO_MIN_BATCH_SIZE: Final = 1 << 12
+
+# Code points are in range(MAX_CODE_POINT_EXCLUSIVE).
+MAX_CODE_POINT_EXCLUSIVE: Final = 0x110000
+
+_DIGITS: Final = b"0123456789abcdef"
+
+
+def vectorize_from(engine: str) -> int | None:
+    """
+    Return the smallest batch to vectorize with `engine`, or None if
+    nothing should be vectorized.
+
+    Raises:
+        ImportError: The numpy engine was requested but NumPy isn't
+        installed.
+    """
+    if engine == ENGINE_PYTHON:
+        return None
+    if np is None:
+        if engine == ENGINE_NUMPY:
+            raise ImportError(
+                "the numpy engine requires NumPy, install it with "
+                "`pip install \"strutils[numpy]\"`",
+            )
+        return None
+    return 0 if engine == ENGINE_NUMPY else AUTO_MIN_BATCH_SIZE
+
+
+def format_code_points(
+    text: str,
+    base: int,
+    width: int,
+    *,
+    uppercase: bool,
+    prefix: str,
+    delimiter: str,
+) -> str | None:
+    """
+    Format the code point of every character of `text` in `base`,
+    zero-filled to `width` digits and preceded by `prefix`, joined by
+    `delimiter`.  Return None if any code point needs more than `width`
+    digits, since the entries wouldn't all be the same length.
+    """
+    codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"),
+                          dtype="<u4")
+    if not codes.size:
+        return ""
+    if _digits_needed(int(codes.max()), base) > width:
+        return None
+
+    digits = _DIGITS.upper() if uppercase else _DIGITS
+    digit_table = np.frombuffer(digits, dtype=np.uint8)
+    prefix_bytes = prefix.encode("utf-8")
+    delimiter_bytes = delimiter.encode("utf-8")
+
+    # Each row is the UTF-8 of one entry followed by the delimiter, so
+    # the rows laid end to end are the whole output (plus a delimiter).
+    start = len(prefix_bytes)
+    rows = np.empty((codes.size, start + width + len(delimiter_bytes)),
+                    dtype=np.uint8)
+    rows[:, :start] = np.frombuffer(prefix_bytes, dtype=np.uint8)
+    rows[:, start + width:] = np.frombuffer(delimiter_bytes, dtype=np.uint8)
+
+    bits_per_digit = base.bit_length() - 1
+    if base == 2:
+        # Unpack the bits of each code point as digits all at once.
+        significant = min(width, 32)
+        rows[:, start:start + width - significant] = ord("0")
+        octets = codes.astype(">u4").view(np.uint8).reshape(-1, 4)
+        bits = np.unpackbits(octets, axis=1)[:, 32 - significant:]
+        np.add(bits, ord("0"), out=rows[:, start + width - significant:
+                                        start + width])
+    elif base == 1 << bits_per_digit:
+        # Shifting and masking is much cheaper than dividing.
+        mask = np.uint32(base - 1)
+        for place, column in enumerate(reversed(range(start,
+                                                      start + width))):
+            shift = np.uint32(place * bits_per_digit)
+            rows[:, column] = digit_table[(codes >> shift) & mask]
+    else:
+        remaining = codes.astype(np.uint32)
+        for column in reversed(range(start, start + width)):
+            rows[:, column] = digit_table[remaining % base]
+            remaining //= base
+
+    # Decode straight from the array, without the trailing delimiter.
+    output = rows.reshape(-1)[:rows.size - len(delimiter_bytes)]
+    return str(memoryview(output), "utf-8")
+
+
+def count_chars(text: str) -> collections.Counter[str]:
+    """Count the occurrences of each character in `text`."""
+    codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"),
+                          dtype="<u4")
+    values, counts = np.unique(codes, return_counts=True)
+    return collections.Counter(
+        dict(zip(map(chr, values.tolist()), counts.tolist())),
+    )
+
+
+def parse_code_points(tokens: list[str], base: int | None) -> array | None:
+    """
+    Parse tokens of plain digits into an array of unsigned 32-bit code
+    points, with `base` (decimal if None, in which case no token can have
+    a leading zero since it would denote C-style octal).  Return None if
+    any token is anything else (prefixed, a range, etc.) or the value of
+    any token isn't a valid code point.
+    """
+    if not tokens:
+        return array("I")
+    joined = " ".join(tokens)
+    if not joined.isascii():
+        return None
+
+    radix = 10 if base is None else base
+    lengths = np.fromiter(map(len, tokens), dtype=np.int64,
+                          count=len(tokens))
+    # Empty tokens aren't valid, but would parse as 0.
+    if int(lengths.min()) == 0:
+        return None
+    # Longer tokens can only be out of range (or have leading zeros,
+    # which are left to the slow path anyway).
+    if int(lengths.max()) > _digits_needed(MAX_CODE_POINT_EXCLUSIVE - 1,
+                                           radix):
+        return None
+
+    data = np.frombuffer(joined.encode("ascii"), dtype=np.uint8)
+    digits = data[data != ord(" ")]
+    values_of_digits = _digit_values(radix)[digits]
+    if (values_of_digits < 0).any():
+        return None
+
+    offsets = np.zeros(len(tokens), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+    if not _valid_first_digits(digits[offsets], base, lengths):
+        return None
+
+    # Value of each digit at its place within its token.
+    ends = np.repeat(offsets + lengths, lengths)
+    places = ends - 1 - np.arange(digits.size)
+    powers = radix ** np.arange(int(lengths.max()), dtype=np.int64)
+    values = np.add.reduceat(values_of_digits * powers[places], offsets)
+    if int(values.max()) >= MAX_CODE_POINT_EXCLUSIVE:
+        return None
+
+    result = array("I")
+    result.frombytes(values.astype(np.uint32).tobytes())
+    return result
+
+
+def _digits_needed(code: int, base: int) -> int:
+    digits = 1
+    while code >= base:
+        code //= base
+        digits += 1
+    return digits
+
+
+def _digit_values(base: int) -> "npt.NDArray":
+    """Table from ASCII byte to its value as a digit of `base`, or -1."""
+    table = np.full(0x100, -1, dtype=np.int64)
+    for value in range(base):
+        table[ord(f"{value:x}")] = value
+        table[ord(f"{value:X}")] = value
+    return table
+
+
+def _valid_first_digits(
+    first_digits: "npt.NDArray",
+    base: int | None,
+    lengths: "npt.NDArray",
+) -> bool:
+    if base is None:
+        # A lone 0 is decimal, but any longer token with a leading 0 is
+        # C-style octal.
+        return not ((first_digits == ord("0")) & (lengths > 1)).any()
+    # With an explicit base, the characters of "0xob" are stripped from
+    # the front of each token before parsing it, which would change the
+    # value of tokens starting with any of them.
+    stripped = np.frombuffer(b"0xob", dtype=np.uint8)
+    return not np.isin(first_digits, stripped).any()
+
+
+class NumpySampler(PooledSampler):
+    """
+    Weighted sampling of characters from a NumPy random Generator
+    (PCG64) seeded with `seed`.  Each pool of characters is drawn as an
+    array of indices into the alphabet, and converted to text in one
+    pass over the matching array of code points.
+    """
+
+    def __init__(self, charset: str, weights: Sequence[int],
+                 seed: int) -> None:
+        super().__init__()
+        self.rng = np.random.Generator(np.random.PCG64(seed))
+        codes = np.frombuffer(charset.encode("utf-32-le", "surrogatepass"),
+                              dtype="<u4")
+        # One byte per character is enough if they are all Latin-1.
+        if codes.size and int(codes.max()) < 0x100:
+            self._codes = codes.astype(np.uint8)
+            self._encoding = "latin-1"
+        else:
+            self._codes = codes
+            self._encoding = "utf-32-le"
+
+        counts = np.asarray(weights, dtype=np.int64)
+        self._cum_counts = np.cumsum(counts)
+        self._probabilities: "npt.NDArray | None" = None
+        if (counts != 1).any():
+            self._probabilities = counts / self._cum_counts[-1]
+
+    def sample(self, k: int) -> str:
+        """
+        Return a string of `k` characters chosen without replacement,
+        where a character is repeated in the population as many times as
+        its weight (like random.sample() with `counts`).
+        """
+        indices = self.rng.choice(int(self._cum_counts[-1]), size=k,
+                                  replace=False)
+        return self._to_text(np.searchsorted(self._cum_counts, indices,
+                                             side="right"))
+
+    def _draw(self, k: int) -> str:
+        if self._probabilities is None:
+            indices = self.rng.integers(0, self._codes.size, size=k)
+        else:
+            indices = self.rng.choice(self._codes.size, size=k,
+                                      p=self._probabilities)
+        return self._to_text(indices)
+
+    def _to_text(self, indices: "npt.NDArray") -> str:
+        return str(memoryview(self._codes[indices]), self._encoding,
+                   "surrogatepass")
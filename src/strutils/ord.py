@@ -23,13 +23,84 @@ strings with no whitespace joining them. Use quoting to preserve
 whitespace in your shell script.
 """
 
+import codecs
+import collections
+import functools
+import heapq
+import io
 import math
+import os
 import sys
-from argparse import SUPPRESS, ArgumentParser, Namespace, RawTextHelpFormatter
+from argparse import (SUPPRESS, ArgumentParser, ArgumentTypeError, Namespace,
+                      RawTextHelpFormatter)
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import (AnyStr, BinaryIO, Callable, Final, Iterable, Iterator,
+                    NoReturn)
+
+from .common import vectorized
+from .common.escaping import escape
+from .common.output import exit_with_error
+from .common.parallel import map_bounded
+from .common.packing import PACKED_FORMATS, pack
+from .common.parsing import (comma_separated_choices, non_negative_int,
+                             positive_int)
+from .common.streaming import (iter_fixed_windows, iter_text_chunks,
+                               slice_chunks)
+from .common.unicode import ANNOTATION_FIELDS, Annotator
 
 __author__ = "Vincent Lin"
 
+# Cap on the number of non-ASCII characters to remember the formatted
+# code points of, per width, so that input covering a large part of
+# Unicode can't grow the tables without bound.
+MAX_CACHED_FORMATS: Final = 1 << 13
+
+# --width values other than a fixed number of digits.
+WIDTH_AUTO: Final = "auto"
+WIDTH_UNICODE: Final = "unicode"
+
+MAX_CODE_POINT: Final = 0x10FFFF
+
+# Number of bytes to read at a time for --bytes.
+BYTES_CHUNK_SIZE: Final = 1 << 20
+
+# Number of characters to count at a time for --histogram.  Each chunk
+# is one task when counting in parallel.
+HISTOGRAM_CHUNK_SIZE: Final = 1 << 20
+
+# Number of characters (or bytes) per row if --offsets is used without
+# --columns, same as xxd.
+DEFAULT_COLUMNS: Final = 16
+
+# What the side column of --columns shows in place of characters that
+# aren't printable.
+NON_PRINTABLE_PLACEHOLDER: Final = "."
+
+# bytes.translate() table for the side column of --columns with
+# --bytes, which shows printable ASCII and a placeholder for the rest.
+BYTES_SIDE_TABLE: Final = bytes(
+    byte if 0x20 <= byte < 0x7F else ord(NON_PRINTABLE_PLACEHOLDER)
+    for byte in range(0x100)
+)
+
+
+def width_spec(value: str) -> str | int:
+    """Argument type for --width: auto, unicode, or a number of digits."""
+    if value in (WIDTH_AUTO, WIDTH_UNICODE):
+        return value
+    try:
+        width = int(value)
+        if width < 0:
+            raise ValueError
+        return width
+    except ValueError:
+        raise ArgumentTypeError(
+            f"expected {WIDTH_AUTO}, {WIDTH_UNICODE}, or a non-negative "
+            f"integer, received {value!r}",
+        ) from None
+
+
 parser = ArgumentParser(prog=Path(sys.argv[0]).name,
                         description=__doc__,
                         formatter_class=RawTextHelpFormatter,
@@ -75,8 +146,86 @@ sep_group.add_argument("-t", "--tabs", action="store_true",
 sep_group.add_argument("-1", dest="one_per_line", action="store_true",
                        help="print each entry on its own line")
 
+parser.add_argument("--emit", metavar="FORMAT", choices=PACKED_FORMATS,
+                    help="write the code points to stdout in a packed binary "
+                         f"FORMAT (one of {', '.join(PACKED_FORMATS)}) for "
+                         "`chr --read` instead of formatting them as text")
+parser.add_argument("--align-window", metavar="N", type=positive_int,
+                    help="align columns only within consecutive blocks of N "
+                         "characters, printing each block as its own "
+                         "line(s); input is then streamed instead of read "
+                         "all at once")
+parser.add_argument("--annotate", metavar="FIELDS",
+                    type=comma_separated_choices(ANNOTATION_FIELDS),
+                    help="append comma-separated Unicode metadata FIELDS "
+                         f"({', '.join(ANNOTATION_FIELDS)}) of each "
+                         "character as TAB-separated columns; implies -1")
+parser.add_argument("--bytes", metavar="ENCODING", nargs="?", const="utf-8",
+                    help="output the bytes of the input encoded with "
+                         "ENCODING (default utf-8) instead of its code "
+                         "points, like a hexdump; use --bytes=ENCODING or "
+                         "`--` before STRING so it isn't taken as ENCODING")
+parser.add_argument("--columns", metavar="N", type=positive_int,
+                    help="lay the output out like xxd, in rows of N "
+                         "characters (or bytes with --bytes) followed by a "
+                         "side column of the printable ones; input is then "
+                         "streamed instead of read all at once")
+parser.add_argument("--offsets", action="store_true",
+                    help="start each row of --columns (default "
+                         f"{DEFAULT_COLUMNS}) with the offset of its first "
+                         "character (or byte) in hexadecimal")
+parser.add_argument("--skip", metavar="OFFSET", type=non_negative_int,
+                    default=0,
+                    help="with --columns, start at character (or byte) "
+                         "OFFSET, seeking to it if dumping the bytes of a "
+                         "file redirected to stdin")
+parser.add_argument("--length", metavar="COUNT", type=non_negative_int,
+                    help="with --columns, stop after COUNT characters (or "
+                         "bytes)")
+parser.add_argument("--histogram", action="store_true",
+                    help="print each distinct character's code point and "
+                         "number of occurrences, most frequent first, "
+                         "instead of every code point")
+parser.add_argument("--top", metavar="K", type=positive_int,
+                    help="with --histogram, only print the K most frequent "
+                         "characters")
+parser.add_argument("--jobs", metavar="N", type=positive_int, default=1,
+                    help="with --histogram, count chunks of the input in N "
+                         "processes (default 1)")
+parser.add_argument("--engine", choices=vectorized.ENGINES,
+                    default=vectorized.ENGINE_AUTO,
+                    help="format large inputs with NumPy (numpy), or always "
+                         "in pure Python (python); auto (default) uses NumPy "
+                         "if it is installed")
+parser.add_argument("--width", metavar="auto|N|unicode", type=width_spec,
+                    default=WIDTH_AUTO,
+                    help="zero-fill code points to the width needed by the "
+                         "largest one in the input (auto, default), to N "
+                         "digits, or to the width needed by U+10FFFF "
+                         "(unicode); a fixed width lets the input be "
+                         "streamed in a single pass unless echoing")
+
+
+class FormattedCodes(dict[str, str]):
+    """
+    Table from character to its formatted code point, for a fixed width.
+    ASCII is formatted upfront, and the rest of the characters are
+    formatted and cached (up to a limit) as they are looked up.
+    """
+
+    def __init__(self, format_code: Callable[[int], str]) -> None:
+        super().__init__(
+            (chr(code), format_code(code)) for code in range(0x80)
+        )
+        self.format_code = format_code
+
+    def __missing__(self, ch: str) -> str:
+        formatted = self.format_code(ord(ch))
+        if len(self) < 0x80 + MAX_CACHED_FORMATS:
+            self[ch] = formatted
+        return formatted
+
 
-# pylint: disable=too-few-public-methods
 class CharFormatter:
     """Configurable code point formatter to use on each character.
 
@@ -87,63 +236,144 @@ class CharFormatter:
         formatted = char_formatter("A")  # __call__
     """
 
-    def __init__(self, options: Namespace) -> None:
+    def __init__(self, options: Namespace, *,
+                 width: int | None = None,
+                 vectorize_from: int | None = None) -> None:
+        """
+        If `width` is provided, use it as the fixed zero-fill width
+        instead of computing it from `options.strings`. This allows the
+        formatter to be used on input that isn't known upfront.
+
+        Strings of at least `vectorize_from` characters are formatted by
+        join() with the NumPy engine.
+        """
         self.prefixed: bool = options.prefixed
         self.uppercase: bool = options.uppercase or options.X
-
-        # Compute upfront how much fill width we'll need.
-        string = "".join(options.strings)
-        self._max_codepoint = max(ord(ch) for ch in string)
-
+        self.fixed_width = width
+        self.vectorize_from = vectorize_from
+        # Tables of formatted code points, keyed by width.  Formatting
+        # only ever depends on the width, so they can be reused by every
+        # fit() that needs the same one.
+        self._tables: dict[int, FormattedCodes] = {}
+
+        self._digits_per_bit: int | None
         match options:
-            # TODO: The fill widths below only work assuming all input
-            # characters are ASCII.  Unicode characters whose code points
-            # are represented beyond width digits will mess up the
-            # spacing when echoing them with the ord() values.
             case Namespace(hexadecimal=True) | Namespace(X=True):
                 self.caster = hex
+                self.base = 16
                 self.prefix = "0x"
-                self.width = self._digits_needed(digits_per_bit=4)
+                self._digits_per_bit = 4
             case Namespace(octal=True):
                 self.caster = oct
+                self.base = 8
                 self.prefix = "0o"
-                self.width = self._digits_needed(digits_per_bit=3)
+                self._digits_per_bit = 3
             case Namespace(use_octal_c_style=True):
-                self.caster = lambda code: "0" + oct(code).removeprefix("0o")
+                self.caster = oct_c_style
+                self.base = 8
                 self.prefix = "0"
-                self.width = self._digits_needed(digits_per_bit=3)
+                self._digits_per_bit = 3
             case Namespace(binary=True):
                 self.caster = bin
+                self.base = 2
                 self.prefix = "0b"
-                self.width = self._digits_needed(digits_per_bit=1)
+                self._digits_per_bit = 1
             case _:
                 self.caster = str
+                self.base = 10
                 self.prefix = ""
-                self.width = len(str(self._max_codepoint))
+                self._digits_per_bit = None
+
+        # Compute upfront how much fill width we'll need.
+        self.fit("".join(options.strings))
+
+    def fit(self, string: str) -> None:
+        """
+        Compute the fill widths needed to align the formatted code points
+        of the characters in `string`.  This can be called again to align
+        a different string with the same formatting options.
+        """
+        # TODO: The fill widths below only work assuming all input
+        # characters are ASCII.  Unicode characters whose code points
+        # are represented beyond width digits will mess up the
+        # spacing when echoing them with the ord() values.
+        if self.fixed_width is not None:
+            self.width = self.fixed_width
+        else:
+            # The largest character has the largest code point.
+            self.width = self.digits_needed(ord(max(string, default="\0")))
 
         # The maximum width needed for a char in the original string.
-        self.original_max_width = max(len(escaped(ch)) for ch in string)
+        self.original_max_width = max(
+            (len(escaped(ch)) for ch in set(string)),
+            default=0,
+        )
 
-    def __call__(self, ch: str, echoing: bool) -> str:
-        code = ord(ch)
-
-        if echoing:
-            width = max(self.width, self.original_max_width)
-        else:
-            width = self.width
+        self._table = self._table_for(self.width)
+        self._echo_table = self._table_for(
+            max(self.width, self.original_max_width),
+        )
 
+    def __call__(self, ch: str, echoing: bool) -> str:
+        return (self._echo_table if echoing else self._table)[ch]
+
+    def format_all(self, string: str, echoing: bool) -> Iterator[str]:
+        """
+        Format every character of `string`.  This is the same as calling
+        the formatter on each of them, but is just a table lookup for
+        characters that have been seen before.
+        """
+        table = self._echo_table if echoing else self._table
+        return map(table.__getitem__, string)
+
+    def join(self, string: str, delimiter: str) -> str:
+        """
+        Same as delimiter.join(self.format_all(string, False)), but
+        vectorized for long enough strings if the NumPy engine is used.
+        """
+        if self.vectorize_from is not None and \
+                len(string) >= self.vectorize_from:
+            joined = vectorized.format_code_points(
+                string, self.base, self.width,
+                uppercase=self.uppercase,
+                prefix=self.prefix if self.prefixed else "",
+                delimiter=delimiter,
+            )
+            if joined is not None:
+                return joined
+        return delimiter.join(self.format_all(string, False))
+
+    def format_code(self, code: int, width: int) -> str:
+        """Format code point `code`, zero-filled to `width` digits."""
         casted = self.caster(code).removeprefix(self.prefix).zfill(width)
         if self.uppercase:
             casted = casted.upper()
         return (self.prefix if self.prefixed else "") + casted
 
-    def _digits_needed(self, digits_per_bit: int) -> int:
-        if self._max_codepoint == 0:
-            next_power_of_2 = 1
-        else:
-            next_power_of_2 = (2**(self._max_codepoint - 1)).bit_length()
-        bits_needed = next_power_of_2.bit_length()
-        return math.ceil(bits_needed / digits_per_bit)
+    def _table_for(self, width: int) -> FormattedCodes:
+        try:
+            return self._tables[width]
+        except KeyError:
+            pass
+        table = FormattedCodes(functools.partial(self.format_code,
+                                                 width=width))
+        self._tables[width] = table
+        return table
+
+    def digits_needed(self, code: int) -> int:
+        """
+        Return the number of digits (excluding any prefix) needed to
+        format code point `code`.
+        """
+        if self._digits_per_bit is None:
+            return len(str(code))
+        bits_needed = max(code.bit_length(), 1)
+        return math.ceil(bits_needed / self._digits_per_bit)
+
+
+def oct_c_style(code: int) -> str:
+    """Like oct(), but with the C-style prefix (single leading 0)."""
+    return "0" + oct(code).removeprefix("0o")
 
 
 def escaped(ch: str) -> str:
@@ -151,7 +381,7 @@ def escaped(ch: str) -> str:
     Return a string representation that can be safely printed without
     messing up formatting.
     """
-    safe = repr(ch).strip("'\"")
+    safe = escape(ch)
     if safe == " ":
         return "SPC"  # So it doesn't break external parsers, prolly.
     return safe
@@ -159,8 +389,12 @@ def escaped(ch: str) -> str:
 
 def print_one_per_line(string: str, echo: bool,
                        formatter: CharFormatter,
+                       annotate: Annotator | None = None,
                        ) -> None:
-    """Handle the case where each result goes on a separate line."""
+    """
+    Handle the case where each result goes on a separate line, with the
+    columns from `annotate` appended if provided.
+    """
     if echo:
         width = formatter.original_max_width
 
@@ -169,46 +403,456 @@ def print_one_per_line(string: str, echo: bool,
     else:
         format_line = formatter
 
+    if annotate is not None:
+        format_code = format_line
+
+        def format_line(ch: str, echo: bool, /) -> str:
+            return f"{format_code(ch, echo)}\t{annotate(ord(ch))}"
+    elif not echo:
+        print(formatter.join(string, "\n"))
+        return
+
     lines = "\n".join(format_line(ch, echo) for ch in string)
     print(lines)
 
 
+def print_formatted(string: str, echo: bool, one_per_line: bool,
+                    delimiter: str, formatter: CharFormatter,
+                    annotate: Annotator | None = None,
+                    ) -> None:
+    """Print the formatted code points of the characters in `string`."""
+    if one_per_line or annotate is not None:
+        print_one_per_line(string, echo, formatter, annotate)
+        return
+
+    if echo:
+        output = delimiter.join(formatter.format_all(string, echo))
+    else:
+        output = formatter.join(string, delimiter)
+
+    if echo:
+        prefixed = formatter.prefixed
+        decimal = formatter.prefix == ""
+
+        width = formatter.width + (2 if prefixed and not decimal else 0)
+        width = max(width, formatter.original_max_width)
+
+        echoed = delimiter.join(escaped(ch).ljust(width) for ch in string)
+        print(echoed)
+    print(output)
+
+
+def print_streamed(chunks: Iterable[str], one_per_line: bool,
+                   delimiter: str, formatter: CharFormatter,
+                   annotate: Annotator | None = None,
+                   ) -> bool:
+    """
+    Print the formatted code points of the characters in `chunks` as
+    they are read, which requires the formatter to have a fixed width.
+    Return whether there were any characters.
+    """
+    printed_any = False
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if one_per_line or annotate is not None:
+            print_one_per_line(chunk, False, formatter, annotate)
+        else:
+            if printed_any:
+                sys.stdout.write(delimiter)
+            sys.stdout.write(formatter.join(chunk, delimiter))
+        printed_any = True
+
+    if printed_any and not (one_per_line or annotate is not None):
+        sys.stdout.write("\n")
+    return printed_any
+
+
+def render_bytes_with(delimiter: str, formatter: CharFormatter,
+                      width: int) -> Callable[[bytes], str]:
+    """
+    Return a function that formats every byte of its argument like
+    `formatter` would format the code point of the same value.  Plain
+    hexadecimal is rendered by bytes.hex() in one call, and other formats
+    by joining from a table of all 256 formatted bytes.
+    """
+    if formatter.caster is hex and not formatter.prefixed and width == 2 \
+            and len(delimiter) <= 1 and delimiter.isascii():
+        def render_hex(data: bytes) -> str:
+            rendered = data.hex(delimiter) if delimiter else data.hex()
+            return rendered.upper() if formatter.uppercase else rendered
+        return render_hex
+
+    table = [formatter.format_code(byte, width) for byte in range(0x100)]
+
+    def render_from_table(data: bytes) -> str:
+        return delimiter.join(map(table.__getitem__, data))
+    return render_from_table
+
+
+def iter_encoded(chunks: Iterable[str], encoding: str) -> Iterator[bytes]:
+    """
+    Encode the text in `chunks` with `encoding` a chunk at a time,
+    exiting if any of it can't be encoded.
+    """
+    encoder = codecs.getincrementalencoder(encoding)()
+    try:
+        for chunk in chunks:
+            if data := encoder.encode(chunk):
+                yield data
+        if data := encoder.encode("", final=True):
+            yield data
+    except UnicodeEncodeError as error:
+        exit_with_error(f"could not encode the input: {error}")
+
+
+def iter_raw_blocks(stream: BinaryIO, skip: int = 0) -> Iterator[bytes]:
+    """
+    Read `stream` a block at a time, starting after the first `skip`
+    bytes.  They are seeked past if the stream supports it, and read and
+    discarded otherwise.
+    """
+    if skip and stream.seekable():
+        stream.seek(skip, os.SEEK_CUR)
+        skip = 0
+    blocks = iter(functools.partial(stream.read, BYTES_CHUNK_SIZE), b"")
+    yield from slice_chunks(blocks, skip)
+
+
+def print_bytes(blocks: Iterable[bytes], delimiter: str,
+                render: Callable[[bytes], str],
+                ) -> bool:
+    """
+    Print the bytes in `blocks` as formatted by `render`, a block at a
+    time.  Return whether there were any bytes.
+    """
+    printed_any = False
+    for data in blocks:
+        if not data:
+            continue
+        if printed_any:
+            sys.stdout.write(delimiter)
+        sys.stdout.write(render(data))
+        printed_any = True
+
+    if printed_any:
+        sys.stdout.write("\n")
+    return printed_any
+
+
+class _SideColumnTable(dict[int, str]):
+    """
+    str.translate() table for the side column of --columns, which shows
+    printable characters as they are and a placeholder for the rest.
+    """
+
+    def __missing__(self, code: int) -> str:
+        ch = chr(code)
+        shown = ch if ch.isprintable() else NON_PRINTABLE_PLACEHOLDER
+        if len(self) < MAX_CACHED_FORMATS:
+            self[code] = shown
+        return shown
+
+
+_side_column_table = _SideColumnTable()
+
+
+def side_column(window: str | bytes) -> str:
+    """Return the side column of --columns for a row of input."""
+    if isinstance(window, bytes):
+        return window.translate(BYTES_SIDE_TABLE).decode("ascii")
+    return window.translate(_side_column_table)
+
+
+def print_rows(windows: Iterable[AnyStr], start: int,
+               columns: int, delimiter: str, cell_width: int,
+               render: Callable[[AnyStr], str], offsets: bool,
+               ) -> bool:
+    """
+    Print each window of `columns` characters (or bytes) as its own row
+    of the --columns layout, where `render` formats a window and each
+    formatted entry is `cell_width` long.  Rows are rendered
+    independently, so only one is ever in memory.  Return whether there
+    were any rows.
+    """
+    row_width = columns * cell_width + (columns - 1) * len(delimiter)
+    offset = start
+    printed_any = False
+    for window in windows:
+        row = render(window).ljust(row_width)
+        if offsets:
+            row = f"{offset:08x}: {row}"
+        print(f"{row}  {side_column(window)}")
+        offset += len(window)
+        printed_any = True
+    return printed_any
+
+
+def count_chars(chunk: str,
+                vectorize_from: int | None = None,
+                ) -> collections.Counter[str]:
+    """
+    Count the occurrences of each character in `chunk`, with the NumPy
+    engine if it has at least `vectorize_from` characters.
+    """
+    if vectorize_from is not None and len(chunk) >= vectorize_from:
+        return vectorized.count_chars(chunk)
+    return collections.Counter(chunk)
+
+
+def count_all_chars(chunks: Iterable[str], jobs: int,
+                    vectorize_from: int | None = None,
+                    ) -> collections.Counter[str]:
+    """
+    Count the occurrences of each character in `chunks` in a single
+    streaming pass.  If `jobs` is more than 1, the chunks are counted in
+    that many processes and the counts are merged as they complete.
+    """
+    count = functools.partial(count_chars, vectorize_from=vectorize_from)
+    counts: collections.Counter[str] = collections.Counter()
+    if jobs == 1:
+        for chunk in chunks:
+            counts.update(count(chunk))
+        return counts
+
+    with ProcessPoolExecutor(jobs) as executor:
+        # Keep a couple of chunks queued per process so none of them
+        # idle, without reading the whole input ahead.
+        for chunk_counts in map_bounded(executor, count, chunks,
+                                        max_pending=2 * jobs):
+            counts.update(chunk_counts)
+    return counts
+
+
+def print_histogram(counts: collections.Counter[str], echo: bool,
+                    delimiter: str, formatter: CharFormatter,
+                    top: int | None = None,
+                    annotate: Annotator | None = None,
+                    ) -> None:
+    """
+    Print a row of code point and count for each character in `counts`,
+    most frequent first (ties in code point order), with the columns
+    from `annotate` appended if provided.
+    """
+    def rank(item: tuple[str, int]) -> tuple[int, str]:
+        ch, count = item
+        return -count, ch
+
+    if top is None:
+        rows = sorted(counts.items(), key=rank)
+    else:
+        rows = heapq.nsmallest(top, counts.items(), key=rank)
+
+    formatter.fit("".join(ch for ch, _ in rows))
+    width = formatter.original_max_width
+
+    lines = []
+    for ch, count in rows:
+        line = f"{formatter(ch, False)}{delimiter}{count}"
+        if echo:
+            line = f"{escaped(ch).rjust(width)} {line}"
+        if annotate is not None:
+            line = f"{line}\t{annotate(ord(ch))}"
+        lines.append(line)
+    print("\n".join(lines))
+
+
+def emit_packed(chunks: Iterable[str], packed_format: str) -> bool:
+    """
+    Write the code points of the characters in `chunks` to stdout in a
+    packed binary format.  Return whether there were any characters.
+    """
+    emitted_any = False
+    for chunk in chunks:
+        sys.stdout.buffer.write(pack(chunk, packed_format))
+        emitted_any = emitted_any or bool(chunk)
+    return emitted_any
+
+
+def exit_no_strings() -> NoReturn:
+    """Exit with an error for receiving no input."""
+    sys.stderr.write("Expected at least one string.\n")
+    sys.exit(22)
+
+
 def main() -> None:
     """Main driver function."""
     namespace = parser.parse_args()
 
-    if not namespace.strings:
-        namespace.strings = [sys.stdin.read()]
-    string: str = "".join(namespace.strings)
-    if not string:
-        sys.stderr.write("Expected at least one string.\n")
-        sys.exit(22)
-
     echo: bool = namespace.echo
     one_per_line: bool = namespace.one_per_line
     delimiter: str = namespace.delimiter
     tabs: bool = namespace.tabs
     if tabs:
         delimiter = "\t"
+    align_window: int | None = namespace.align_window
+    packed_format: str | None = namespace.emit
+
+    annotate: Annotator | None = None
+    if namespace.annotate is not None:
+        if packed_format is not None:
+            parser.error("--annotate cannot be used with --emit")
+        if tabs or delimiter != " ":
+            parser.error("--annotate cannot be used with a delimiter "
+                         "since it prints one entry per line")
+        annotate = Annotator(namespace.annotate)
+
+    try:
+        vectorize_from = vectorized.vectorize_from(namespace.engine)
+    except ImportError as error:
+        parser.error(str(error))
+
+    width: int | None = None
+    if namespace.width == WIDTH_UNICODE:
+        width = CharFormatter(namespace, width=0).digits_needed(MAX_CODE_POINT)
+    elif namespace.width != WIDTH_AUTO:
+        width = namespace.width
+
+    if namespace.histogram:
+        if packed_format is not None or namespace.bytes is not None \
+                or align_window is not None or namespace.columns \
+                or namespace.offsets:
+            parser.error("--histogram cannot be used with --emit, --bytes, "
+                         "--align-window, --columns, or --offsets")
+        chunks: Iterable[str] = (
+            namespace.strings
+            or iter_text_chunks(sys.stdin, HISTOGRAM_CHUNK_SIZE)
+        )
+        counts = count_all_chars(chunks, namespace.jobs, vectorize_from)
+        if not counts:
+            exit_no_strings()
+        char_formatter = CharFormatter(namespace, width=width)
+        print_histogram(counts, echo, delimiter, char_formatter,
+                        namespace.top, annotate)
+        return
+    if namespace.top is not None or namespace.jobs != 1:
+        parser.error("--top and --jobs require --histogram")
+
+    columns: int | None = namespace.columns
+    if namespace.offsets and columns is None:
+        columns = DEFAULT_COLUMNS
+    skip: int = namespace.skip
+    stop: int | None = None
+    if namespace.length is not None:
+        stop = skip + namespace.length
+    if columns is None and (skip or stop is not None):
+        parser.error("--skip and --length require --columns")
+    if columns is not None and (echo or one_per_line
+                                or annotate is not None
+                                or packed_format is not None
+                                or align_window is not None):
+        parser.error("--columns cannot be used with --echo, -1, --annotate, "
+                     "--emit, or --align-window")
+
+    if namespace.bytes is not None:
+        if echo or annotate is not None or packed_format is not None \
+                or align_window is not None:
+            parser.error("--bytes cannot be used with --echo, --annotate, "
+                         "--emit, or --align-window")
+        try:
+            encoding = codecs.lookup(namespace.bytes).name
+        except LookupError:
+            parser.error(f"unknown encoding {namespace.bytes!r} for "
+                         "--bytes")
+
+        blocks: Iterable[bytes]
+        if namespace.strings:
+            blocks = iter_encoded(namespace.strings, encoding)
+        elif encoding == codecs.lookup(sys.stdin.encoding).name and \
+                isinstance(sys.stdin.buffer, io.BufferedIOBase):
+            # The input is already in the requested encoding, so its
+            # bytes can be dumped as they are.
+            blocks = iter_raw_blocks(sys.stdin.buffer, skip)
+            blocks = slice_chunks(blocks, 0,
+                                  None if stop is None else stop - skip)
+            skip, stop = 0, None
+        else:
+            chunks = iter_text_chunks(sys.stdin, BYTES_CHUNK_SIZE)
+            blocks = iter_encoded(chunks, encoding)
+        blocks = slice_chunks(blocks, skip, stop)
+
+        char_formatter = CharFormatter(namespace, width=width)
+        if width is None:
+            width = char_formatter.digits_needed(0xFF)
+        if one_per_line:
+            delimiter = "\n"
+        render = render_bytes_with(delimiter, char_formatter, width)
+
+        if columns is not None:
+            cell_width = len(char_formatter.format_code(0, width))
+            if not print_rows(iter_fixed_windows(blocks, columns),
+                              namespace.skip, columns, delimiter,
+                              cell_width, render, namespace.offsets) \
+                    and not (namespace.skip or stop is not None):
+                exit_no_strings()
+        elif not print_bytes(blocks, delimiter, render):
+            exit_no_strings()
+        return
 
-    char_formatter = CharFormatter(namespace)
+    if columns is not None:
+        chunks = namespace.strings or iter_text_chunks(sys.stdin)
+        if width is None:
+            width = CharFormatter(namespace, width=0).digits_needed(
+                MAX_CODE_POINT,
+            )
+        char_formatter = CharFormatter(namespace, width=width,
+                                       vectorize_from=vectorize_from)
+
+        def render_chars(window: str) -> str:
+            return char_formatter.join(window, delimiter)
+
+        cell_width = len(char_formatter.format_code(0, width))
+        if not print_rows(iter_fixed_windows(slice_chunks(chunks, skip, stop),
+                                             columns),
+                          skip, columns, delimiter, cell_width,
+                          render_chars, namespace.offsets) \
+                and not (skip or stop is not None):
+            exit_no_strings()
+        return
 
-    if one_per_line:
-        print_one_per_line(string, echo, char_formatter)
+    if packed_format is not None:
+        chunks = namespace.strings or iter_text_chunks(sys.stdin)
+        if not emit_packed(chunks, packed_format):
+            exit_no_strings()
         return
 
-    output = delimiter.join(char_formatter(ch, echo) for ch in string)
+    if align_window is not None:
+        # Don't read all of stdin upfront since each window is aligned
+        # independently anyway.
+        chunks = namespace.strings or iter_text_chunks(sys.stdin)
+        char_formatter = CharFormatter(namespace, width=width,
+                                       vectorize_from=vectorize_from)
+
+        printed_any = False
+        for window in iter_fixed_windows(chunks, align_window):
+            char_formatter.fit(window)
+            print_formatted(window, echo, one_per_line, delimiter,
+                            char_formatter, annotate)
+            printed_any = True
+        if not printed_any:
+            exit_no_strings()
+        return
 
-    if echo:
-        prefixed = char_formatter.prefixed
-        decimal = char_formatter.prefix == ""
+    if width is not None and not echo:
+        # Nothing needs to be known about the input upfront.
+        chunks = namespace.strings or iter_text_chunks(sys.stdin)
+        char_formatter = CharFormatter(namespace, width=width,
+                                       vectorize_from=vectorize_from)
+        if not print_streamed(chunks, one_per_line, delimiter,
+                              char_formatter, annotate):
+            exit_no_strings()
+        return
 
-        width = char_formatter.width + (2 if prefixed and not decimal else 0)
-        width = max(width, char_formatter.original_max_width)
+    if not namespace.strings:
+        namespace.strings = [sys.stdin.read()]
+    string: str = "".join(namespace.strings)
+    if not string:
+        exit_no_strings()
 
-        echoed = delimiter.join(escaped(ch).ljust(width) for ch in string)
-        print(echoed)
-    print(output)
+    char_formatter = CharFormatter(namespace, width=width,
+                                   vectorize_from=vectorize_from)
+    print_formatted(string, echo, one_per_line, delimiter, char_formatter,
+                    annotate)
 
 
 if __name__ == "__main__":
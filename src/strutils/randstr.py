@@ -73,6 +73,26 @@ EXAMPLES:
         $ randstr 10-20 -s 456789252 | wc -c
         17
 
+    Generating IDs from a template instead of a length::
+
+        $ randstr -t '[A-Z]{3}-[0-9]{4}' -N 3 -s 1
+        DWT-0847
+        GML-0472
+        QUC-9900
+
+    Drawing from Unicode classes, here all uppercase letters and the
+    Greek block::
+
+        $ randstr 20 -n -c gc=Lu -c 'blk=Greek and Coptic'
+        ȊꟅƼǑ𝘎Å𝘖𝒩ÇԨԷℇƳԀ𝗚𖹛Ƕ𐖕Ỵ𝐕
+
+    Generating unique codes, with no duplicates among them::
+
+        $ randstr 4 -c D --distinct 3 -s 1
+        5801
+        4324
+        4704
+
     Repeating the same character 30 times::
 
         $ randstr 30 -na E
@@ -83,6 +103,61 @@ EXAMPLES:
         $ randstr 5-40 -na E
         EEEEEEEEEEEE
 
+    Generating many strings at once, each of random length::
+
+        $ randstr 4-8 -N 3 -n -c L
+        qcwtzg
+        hxoa
+        vmbfjuey
+
+    Writing a huge seeded fixture to a file, in constant memory::
+
+        $ randstr 5000000000 -s 42 -o fixture.txt
+
+    Generating it in 8 processes instead, reproducible with any number
+    of processes::
+
+        $ randstr 5000000000 -s 42 -j 8 -o fixture.txt
+
+    Generating it much faster with NumPy (if installed), reproducible
+    with the same engine::
+
+        $ randstr 5000000000 -s 42 --engine numpy -o fixture.txt
+
+    Generating only the strings at some indices of the sequence for a
+    seed, here a shard of three, without generating those before them::
+
+        $ randstr 8 -s 42 --index 1000000-1000002
+        oApbwGhE
+        9NZB1ft8
+        n6xl2axt
+
+    Generating passwords from the secure random source of the operating
+    system (which can't be seeded)::
+
+        $ randstr 20 -N 2 -n -c AD -a '!@#$%' --secure
+        Y$cUgAelSZJuQyZbpty3
+        F8bV4Llg5Gp7hxxGayZI
+
+TEMPLATES:
+
+    With `-t`/`--template`, each string is generated from a `PATTERN`
+    written in a small regex-like grammar:
+
+        - `[...]` : one character of a class, made of single characters
+          and ranges like `A-Z` (a literal `-` goes first or last)
+        - `.` : one character of the `ALPHABET` (resolved from the
+          `SOURCE`s as usual)
+        - `{N}`, `{M,N}`, `?` : repeat the previous item exactly `N`
+          times, between `M` and `N` times, or 0 or 1 times
+        - `(...)` : a group, with `|` to choose one of its alternatives
+          (equally likely); `|` also works at the top level
+        - `\` : take the next character literally, e.g. `\.` or `\{`
+        - anything else is literal
+
+    The template is compiled once, and strings are generated from it in
+    batches, which is much faster than combining many `randstr` calls.
+
 REFERENCE:
 
     The supported character class `FLAG`s are listed below. They have a
@@ -98,19 +173,45 @@ REFERENCE:
         - O : octal digits
         - P : punctuation
         - * : printable (equivalent to D + A + P + S)
+
+    Unicode character classes can also be supplied to `-c`, one per
+    option instance, as specs of the form `PROPERTY=VALUE`:
+
+        - gc=CATEGORY : a general category (e.g. `gc=Lu`) or all
+          categories of a major class (e.g. `gc=L` for all letters)
+        - blk=BLOCK : the assigned characters of a block (e.g.
+          `blk=Greek and Coptic`); names are matched ignoring case,
+          spaces, underscores and hyphens
+
+    They are merged with the flags like any other class. Surrogates are
+    never included. Finding the characters of a general category visits
+    every code point, so the index built to do so is cached under
+    `$XDG_CACHE_HOME/strutils` (by default `~/.cache/strutils`). Even
+    classes of 100k characters are sampled from without building them.
 """
 
 import argparse
+import bisect
 import collections
+import contextlib
+import functools
+import itertools
+import math
 import random
 import string
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Final
+from typing import Callable, Final, Iterable, Iterator, TextIO
 
-from .common import parsing
+from .common import parsing, vectorized
+from .common.distinct import distinct_set
 from .common.functional import readonly_struct
 from .common.output import exit_with_error, log_warning, print_stderr
+from .common.parallel import map_bounded
+from .common.sampling import AliasTable, SecureSampler, derive_seed
+from .common.template import CharClass, Node, compile_template
+from .common.unicode import CodePointRanges, character_class
 
 FLAG_WHITESPACE: Final = "S"
 FLAG_ASCII_LOWERCASE: Final = "L"
@@ -136,39 +237,186 @@ FLAG_TO_CHARSET: Final = {
 
 WeightedAlphabet = collections.Counter
 
+# Maximum number of characters to generate at a time, so that memory
+# use doesn't grow with the length of the strings.
+GENERATION_BLOCK_SIZE: Final = 1 << 16
+
+# Number of strings to generate at a time with --distinct.
+DISTINCT_BATCH_SIZE: Final = 1 << 12
+
+# Give up on --distinct after drawing this many strings in a row
+# without a single new one.
+DISTINCT_MAX_STALLED_DRAWS: Final = 1 << 20
+
+# Warn about --distinct if the birthday bound expects more duplicates
+# than this fraction of the strings to be rejected.
+DISTINCT_WARNING_RATIO: Final = 0.1
+
+# First key of the path that the seed of each --index string is derived
+# with, which keeps those seeds apart from the seeds of -j blocks (keyed
+# by their non-negative index alone).
+INDEX_SEED_KEY: Final = -1
+
+# Number of strings to generate at a time with --template.
+TEMPLATE_BATCH_SIZE: Final = 1 << 12
+
+# Number of string lengths to draw at a time with --engine numpy.
+LENGTH_BATCH_SIZE: Final = 1 << 12
+
+# Number of characters to buffer before each write, so that many short
+# strings (with -N) are joined into fewer writes.
+WRITE_BUFFER_SIZE: Final = 1 << 16
+
+# Weighted alphabets with at least this many distinct characters are
+# sampled from an alias table instead of with random.choices(), whose
+# bisection per character starts to cost more than the table lookups.
+ALIAS_MIN_ALPHABET_SIZE: Final = 1 << 8
+
 
 def main() -> None:
     options = parse_options()
 
-    seed_in_use = set_rng_seed(options.rng_seed)
-    if options.verbosity_level >= 1:
-        print_stderr(f"SEED: {seed_in_use}")
+    seed_in_use = None
+    if not options.secure:
+        seed_in_use = set_rng_seed(options.rng_seed)
+        if options.verbosity_level >= 1:
+            print_stderr(f"SEED: {seed_in_use}")
 
+    class_ranges = resolve_class_specs(options.alphabet_class_flag_strings)
     alphabet = resolve_weighted_alphabet_from_sources(
         literal_charsets=options.alphabet_literals,
         charset_files=options.alphabet_files,
         charset_class_flag_strings=options.alphabet_class_flag_strings,
+        class_ranges=class_ranges,
     )
+    if class_ranges and (options.secure
+                         or options.engine != vectorized.ENGINE_PYTHON):
+        # These engines need every character of the alphabet upfront.
+        alphabet.update(class_ranges)
+        class_ranges = CodePointRanges()
     if options.verbosity_level >= 2:
         print_stderr(f"ALPHABET: {alphabet}")
-
-    generated_string = generate_random_string(
-        length_range=options.string_length_range,
-        weighted_alphabet=alphabet,
-        unique=options.use_unique_chars,
-    )
-    print(generated_string, end=("\n" if options.use_trailing_newline else ""))
+        if class_ranges:
+            print_stderr(f"CLASSES: {class_ranges}")
+
+    # With --template, the generator only draws characters for `.`.
+    length_range = options.string_length_range or range(1, 2)
+
+    generator: RandomStringGenerator
+    if options.secure:
+        generator = SecureStringGenerator(
+            length_range=length_range,
+            weighted_alphabet=alphabet,
+            unique=options.use_unique_chars,
+        )
+    elif options.engine == vectorized.ENGINE_NUMPY:
+        assert seed_in_use is not None
+        generator = NumpyStringGenerator(
+            length_range=length_range,
+            weighted_alphabet=alphabet,
+            unique=options.use_unique_chars,
+            seed=seed_in_use,
+        )
+    else:
+        generator = RandomStringGenerator(
+            length_range=length_range,
+            weighted_alphabet=alphabet,
+            unique=options.use_unique_chars,
+            class_ranges=class_ranges,
+        )
+
+    program: Node | None = None
+    if options.template is not None:
+        try:
+            default_class = CharClass(
+                generator.generate,
+                size=generator.unique_count,
+                same_char_probability=generator.collision_probability(),
+            )
+            program = compile_template(options.template, default_class)
+        except ValueError as error:
+            exit_with_error(f"invalid template: {error}")
+
+    if options.index_range is not None:
+        # Guaranteed by --index being incompatible with --secure.
+        assert seed_in_use is not None
+        generate_one = generator
+        if program is not None:
+            generate_one = functools.partial(first_of_batch, program)
+        pieces = iter_indexed_pieces(
+            generator,
+            generate_one,
+            options.index_range,
+            options.delimiter,
+            seed=seed_in_use,
+        )
+    elif options.distinct_count is not None:
+        if program is None:
+            generate_batch = generator.generate_many
+            possible_count, same_string = distinct_odds(
+                generator, options.distinct_count,
+            )
+        else:
+            generate_batch = program.generate
+            possible_count = program.count_strings()
+            same_string = program.collision_probability()
+        check_distinct_feasibility(options.distinct_count, possible_count,
+                                   same_string)
+        pieces = iter_distinct_pieces(generate_batch,
+                                      options.distinct_count,
+                                      options.delimiter)
+    elif program is not None:
+        pieces = iter_template_pieces(program, options.string_count,
+                                      options.delimiter)
+    elif options.jobs is None:
+        pieces = iter_output_pieces(generator, options.string_count,
+                                    options.delimiter)
+    else:
+        # Guaranteed by -j being incompatible with --secure.
+        assert seed_in_use is not None
+        pieces = iter_parallel_output_pieces(
+            generator,
+            options.string_count,
+            options.delimiter,
+            seed=seed_in_use,
+            jobs=options.jobs,
+        )
+    if options.use_trailing_newline:
+        pieces = itertools.chain(pieces, ["\n"])
+
+    with contextlib.ExitStack() as stack:
+        output = sys.stdout
+        if options.output_path is not None:
+            try:
+                output = stack.enter_context(
+                    options.output_path.open("wt", encoding="utf-8"),
+                )
+            except OSError as error:
+                exit_with_error(
+                    f"could not open {str(options.output_path)!r} for "
+                    f"writing: {error.strerror}",
+                )
+        write_pieces(pieces, output)
 
 
 @readonly_struct
 class ProgramOptions:
-    string_length_range: range
+    string_length_range: range | None
+    template: str | None
     alphabet_literals: list[str]
     alphabet_files: list[Path]
     alphabet_class_flag_strings: list[str]
     use_unique_chars: bool
     use_trailing_newline: bool
+    string_count: int
+    index_range: range | None
+    distinct_count: int | None
+    delimiter: str
+    output_path: Path | None
     rng_seed: int | None
+    jobs: int | None
+    secure: bool
+    engine: str
     verbosity_level: int
 
 
@@ -180,9 +428,19 @@ def parse_options() -> ProgramOptions:
     parser.add_argument(
         "string_length_range",
         metavar="NUM_OR_RANGE",
-        type=string_length_arg_to_range,
+        nargs="?",
+        type=num_or_range_arg_to_range,
         help="number of characters to generate, or a range in the format "
-             "`LO-HI`; all numbers must be non-negative integers",
+             "`LO-HI`; all numbers must be non-negative integers (required "
+             "unless --template is used)",
+    )
+    parser.add_argument(
+        "-t", "--template",
+        metavar="PATTERN",
+        dest="template",
+        help="generate strings matching PATTERN instead, written in a "
+             "small regex-like grammar (see TEMPLATES), where `.` stands "
+             "for a character of the alphabet",
     )
 
     ##### ALPHABET SOURCES #####
@@ -215,8 +473,9 @@ def parse_options() -> ProgramOptions:
         default=[],
         dest="alphabet_class_flag_strings",
         help="string of flags representing character classes to include "
-             "in the alphabet; overlapping character classes are merged "
-             "so no duplicates are contributed to the final alphabet "
+             "in the alphabet, or a Unicode class spec such as gc=L or "
+             "blk=Cyrillic (see REFERENCE); overlapping character classes are "
+             "merged so no duplicates are contributed to the final alphabet "
              "(in other words, the union of the character sets is used)",
     )
 
@@ -237,6 +496,47 @@ def parse_options() -> ProgramOptions:
         help="integer seed to use to initialize the random number generator "
              "(useful for reproducing strings)",
     )
+    parser.add_argument(
+        "-j", "--jobs",
+        metavar="N",
+        dest="jobs",
+        type=parsing.positive_int,
+        help="generate blocks of the output in N processes, each block "
+             "from its own seed derived from SEED; for a given SEED, the "
+             "output differs from that without this option, but is the "
+             "same for any N",
+    )
+    parser.add_argument(
+        "--index",
+        metavar="K[-M]",
+        dest="index_range",
+        type=num_or_range_arg_to_range,
+        help="generate only the strings at index K (or K through M) of "
+             "the endless sequence of strings for SEED, each from its own "
+             "seed derived from SEED and its index, so that any part of "
+             "the sequence can be regenerated without what comes before "
+             "it; indices start at 0",
+    )
+
+    parser.add_argument(
+        "--secure",
+        dest="secure",
+        action="store_true",
+        help="draw from the cryptographically secure random source of "
+             "the operating system instead of a seeded pseudo-random "
+             "generator, for passwords and tokens (not compatible with "
+             "-s/--seed or -j/--jobs, and no seed is reported with -v)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=(vectorized.ENGINE_PYTHON, vectorized.ENGINE_NUMPY),
+        default=vectorized.ENGINE_PYTHON,
+        dest="engine",
+        help="generate with the `random` module (python, default), or "
+             "in bulk with a NumPy PCG64 generator (numpy), which is much "
+             "faster for long strings; the same SEED gives different "
+             "strings with each engine",
+    )
 
     ##### OUTPUT FORMATTING #####
 
@@ -246,6 +546,41 @@ def parse_options() -> ProgramOptions:
         action="store_true",
         help="append a newline to the output",
     )
+    parser.add_argument(
+        "-N", "--count",
+        metavar="COUNT",
+        dest="string_count",
+        type=parsing.positive_int,
+        default=1,
+        help="number of strings to generate, each with its own length "
+             "drawn from NUM_OR_RANGE (default 1)",
+    )
+    parser.add_argument(
+        "--distinct",
+        metavar="COUNT",
+        dest="distinct_count",
+        type=parsing.positive_int,
+        help="like -N COUNT, but reject duplicates so that all COUNT "
+             "strings are distinct; exits with an error if there aren't "
+             "that many possible strings, and warns if many duplicates "
+             "are expected (by the birthday bound), for templates too",
+    )
+    parser.add_argument(
+        "-d", "--delimiter",
+        metavar="DELIM",
+        dest="delimiter",
+        default="\n",
+        help="string to write between generated strings (default newline)",
+    )
+    parser.add_argument(
+        "-o", "--output",
+        metavar="FILE",
+        dest="output_path",
+        type=Path,
+        help="write to FILE (encoded as UTF-8) instead of STDOUT; either "
+             "way, output is generated and written in fixed-size blocks, "
+             "so memory use doesn't grow with the length of the strings",
+    )
     parser.add_argument(
         "-v", "--verbose",
         dest="verbosity_level",
@@ -259,10 +594,45 @@ def parse_options() -> ProgramOptions:
     )
 
     args = parser.parse_args()
+    if args.index_range is not None:
+        if args.string_count != 1 or args.distinct_count is not None:
+            parser.error("-N/--count and --distinct cannot be used with "
+                         "--index")
+        if args.secure or args.jobs is not None \
+                or args.engine != vectorized.ENGINE_PYTHON:
+            parser.error("--index cannot be used with --secure, "
+                         "-j/--jobs or --engine")
+    if args.distinct_count is not None:
+        if args.string_count != 1:
+            parser.error("-N/--count cannot be used with --distinct")
+        if args.jobs is not None:
+            parser.error("-j/--jobs cannot be used with --distinct")
+    if args.template is None:
+        if args.string_length_range is None:
+            parser.error("the following arguments are required: "
+                         "NUM_OR_RANGE")
+    else:
+        if args.string_length_range is not None:
+            parser.error("NUM_OR_RANGE cannot be used with --template")
+        if args.use_unique_chars or args.secure or args.jobs is not None \
+                or args.engine != vectorized.ENGINE_PYTHON:
+            parser.error("--template cannot be used with -u/--unique, "
+                         "--secure, -j/--jobs or --engine")
+    if args.secure:
+        if args.rng_seed is not None:
+            parser.error("--secure output cannot be seeded with -s/--seed")
+        if args.jobs is not None:
+            parser.error("-j/--jobs cannot be used with --secure")
+        if args.engine != vectorized.ENGINE_PYTHON:
+            parser.error("--engine cannot be used with --secure")
+    try:
+        vectorized.vectorize_from(args.engine)
+    except ImportError as error:
+        parser.error(str(error))
     return ProgramOptions(**vars(args))
 
 
-def string_length_arg_to_range(value: str) -> range:
+def num_or_range_arg_to_range(value: str) -> range:
     parts = value.split("-")
 
     # `value` is simply a "NUM".
@@ -304,6 +674,7 @@ def resolve_weighted_alphabet_from_sources(
     literal_charsets: list[str],
     charset_files: list[Path],
     charset_class_flag_strings: list[str],
+    class_ranges: CodePointRanges,
 ) -> WeightedAlphabet:
     charset_from_literals = "".join(literal_charsets)
 
@@ -311,9 +682,14 @@ def resolve_weighted_alphabet_from_sources(
         file.read_text(encoding="utf-8") for file in charset_files
     )
 
+    # Characters of Unicode classes are left out, since they're already
+    # in `class_ranges` (with the same weight of 1).
     charset_from_flags = "".join(
-        resolve_class_flags(flag_string)
+        ch
         for flag_string in charset_class_flag_strings
+        if not is_class_spec(flag_string)
+        for ch in resolve_class_flags(flag_string)
+        if ch not in class_ranges
     )
 
     concatenated_charsets = (
@@ -321,12 +697,31 @@ def resolve_weighted_alphabet_from_sources(
     )
 
     # If nothing was supplied manually, default to this alphabet.
-    if not concatenated_charsets:
+    if not concatenated_charsets and not class_ranges:
         concatenated_charsets = string.ascii_letters + string.digits
 
     return WeightedAlphabet(concatenated_charsets)
 
 
+def is_class_spec(flag_string: str) -> bool:
+    """Whether a -c argument is a Unicode class spec like gc=L."""
+    return "=" in flag_string
+
+
+def resolve_class_specs(flag_strings: list[str]) -> CodePointRanges:
+    """
+    Resolve the Unicode class specs among `flag_strings` to the union of
+    their characters, as lazy code point ranges.
+    """
+    class_ranges = CodePointRanges()
+    for spec in filter(is_class_spec, flag_strings):
+        try:
+            class_ranges |= character_class(spec)
+        except ValueError as error:
+            log_warning(f"ignoring {error}")
+    return class_ranges
+
+
 def resolve_class_flags(flags: str) -> str:
     # Use a set to remove duplicates: "overlapping character classes are
     # merged so no duplicates are contributed to the final alphabet".
@@ -344,31 +739,542 @@ def resolve_class_flags(flags: str) -> str:
     return "".join(sorted_charset_union)
 
 
-def generate_random_string(
-    *,
-    length_range: range,
-    weighted_alphabet: WeightedAlphabet,
-    unique: bool,
-) -> str:
-    random_length = random.randrange(length_range.start, length_range.stop)
-
-    # NOTE: These two sequences are guaranteed to be parallel. See:
-    # https://stackoverflow.com/a/835430/14226122
-    charset = "".join(weighted_alphabet.keys())
-    counts = list(weighted_alphabet.values())
-
-    if unique:
-        if random_length > len(charset):
+class RandomStringGenerator:
+    """
+    Callable that generates a random string each time it's called. The
+    alphabet is resolved into the sequences that `random` needs once
+    upfront instead of for every string.
+
+    Long strings can also be generated in blocks with iter_blocks(),
+    which yields the exact same characters for the same state of
+    `random` as generate().
+
+    Characters of Unicode classes are passed separately as
+    `class_ranges`, each with a weight of 1, so that large classes are
+    sampled from without building them.
+    """
+
+    def __init__(
+        self,
+        *,
+        length_range: range,
+        weighted_alphabet: WeightedAlphabet,
+        unique: bool,
+        class_ranges: CodePointRanges | None = None,
+    ) -> None:
+        self.length_range = length_range
+        self.unique = unique
+        self.class_ranges = class_ranges or CodePointRanges()
+
+        # NOTE: These two sequences are guaranteed to be parallel. See:
+        # https://stackoverflow.com/a/835430/14226122
+        self.charset = "".join(weighted_alphabet.keys())
+        self.counts = list(weighted_alphabet.values())
+        # random.choices() computes these from the weights on every call
+        # otherwise, and draws the exact same characters from either.
+        self.cum_weights: list[int] | None = list(
+            itertools.accumulate(self.counts),
+        )
+        # With all weights 1, bisecting the cumulative weights picks the
+        # same index as the unweighted floor(random() * n), minus the
+        # cost of the bisection.
+        if all(count == 1 for count in self.counts):
+            self.cum_weights = None
+
+        self.alias_table: AliasTable[str] | None = None
+        if self.cum_weights is not None \
+                and len(self.charset) >= ALIAS_MIN_ALPHABET_SIZE:
+            self.alias_table = AliasTable(self.charset, self.counts)
+
+        self.total_count = sum(self.counts)
+        self.unique_count = len(self.charset) + len(self.class_ranges) \
+            - sum(ch in self.class_ranges for ch in self.charset)
+
+    def __call__(self) -> str:
+        return self.generate(self.random_length())
+
+    def seed(self, seed: int) -> None:
+        """Reseed the generator that characters are drawn from."""
+        random.seed(seed)
+
+    def generate_many(self, count: int) -> list[str]:
+        """Generate `count` random strings, each of a random length."""
+        return [self.generate(self.random_length()) for _ in range(count)]
+
+    def collision_probability(self) -> float:
+        """
+        Return the probability that two characters drawn independently
+        from the alphabet are the same, i.e. the sum of the squares of
+        the probabilities of the characters.
+        """
+        classes = self.class_ranges
+        total = self.total_count + len(classes)
+        squares = len(classes)
+        for ch, count in zip(self.charset, self.counts):
+            weight = count + (ch in classes)
+            squares += weight * weight - (ch in classes)
+        return squares / (total * total)
+
+    def random_length(self) -> int:
+        """Draw the length of the next string from the length range."""
+        return random.randrange(self.length_range.start,
+                                self.length_range.stop)
+
+    def generate(self, length: int) -> str:
+        """Generate a random string of `length` characters in one go."""
+        if self.class_ranges:
+            return self._generate_with_classes(length)
+
+        if self.unique:
+            self.check_length(length)
+            return "".join(random.sample(self.charset, k=length,
+                                         counts=self.counts))
+
+        if self.alias_table is not None:
+            return "".join(self.alias_table.choices(length))
+        return "".join(random.choices(self.charset, k=length,
+                                      cum_weights=self.cum_weights))
+
+    def check_length(self, length: int) -> None:
+        """Exit with an error if no string of `length` can be generated."""
+        if self.unique and length > self.unique_count:
             exit_with_error(
-                f"cannot choose {random_length} unique characters from "
-                f"alphabet of {len(charset)} unique characters",
+                f"cannot choose {length} unique characters from "
+                f"alphabet of {self.unique_count} unique characters",
             )
 
-        chars = random.sample(charset, k=random_length, counts=counts)
+    def _generate_with_classes(self, length: int) -> str:
+        # Like random.choices() and random.sample() with `counts` do
+        # internally, pick indices into the whole population: the
+        # weighted characters followed by those of the classes.
+        classes = self.class_ranges
+        if not self.charset:
+            if self.unique:
+                self.check_length(length)
+                return "".join(random.sample(classes, k=length))
+            return "".join(random.choices(classes, k=length))
+
+        total = self.total_count
+        cum_weights = self.cum_weights or list(
+            itertools.accumulate(self.counts),
+        )
+        if self.unique:
+            self.check_length(length)
+            indices: Iterable[float] = random.sample(
+                range(total + len(classes)), k=length,
+            )
+        else:
+            size = total + len(classes)
+            indices = [random.random() * size for _ in range(length)]
+        charset = self.charset
+        return "".join([
+            charset[bisect.bisect(cum_weights, index)] if index < total
+            else classes[int(index - total)]
+            for index in indices
+        ])
+
+    def iter_blocks(self, length: int) -> Iterator[str]:
+        """
+        Generate a random string of `length` characters as consecutive
+        blocks of at most GENERATION_BLOCK_SIZE characters.
+        """
+        # Bounded by the size of the alphabet, so no need for blocks.
+        if self.unique:
+            yield self.generate(length)
+            return
+
+        # Every character drawn with replacement consumes exactly one
+        # call to random.random(), so drawing them in blocks doesn't
+        # change the string generated from a given seed.
+        for start in range(0, length, GENERATION_BLOCK_SIZE):
+            yield self.generate(min(GENERATION_BLOCK_SIZE, length - start))
+
+
+class SecureStringGenerator(RandomStringGenerator):
+    """
+    RandomStringGenerator that draws from os.urandom() instead of the
+    global (Mersenne Twister) generator of `random`, for --secure.
+    """
+
+    def __init__(
+        self,
+        *,
+        length_range: range,
+        weighted_alphabet: WeightedAlphabet,
+        unique: bool,
+    ) -> None:
+        super().__init__(
+            length_range=length_range,
+            weighted_alphabet=weighted_alphabet,
+            unique=unique,
+        )
+        self.system_random = random.SystemRandom()
+        self.sampler = SecureSampler(self.charset, self.counts)
+
+    def random_length(self) -> int:
+        # Skip the system call when there is only one possible length.
+        if len(self.length_range) == 1:
+            return self.length_range.start
+        return self.system_random.randrange(self.length_range.start,
+                                            self.length_range.stop)
+
+    def generate(self, length: int) -> str:
+        if self.unique:
+            self.check_length(length)
+            return "".join(self.system_random.sample(
+                self.charset, k=length, counts=self.counts,
+            ))
+        return self.sampler.choices(length)
+
+
+class NumpyStringGenerator(RandomStringGenerator):
+    """
+    RandomStringGenerator that draws from a NumPy random Generator in
+    bulk instead of from `random`, for --engine numpy.  Lengths are
+    drawn LENGTH_BATCH_SIZE at a time as well.
+    """
+
+    def __init__(
+        self,
+        *,
+        length_range: range,
+        weighted_alphabet: WeightedAlphabet,
+        unique: bool,
+        seed: int,
+    ) -> None:
+        super().__init__(
+            length_range=length_range,
+            weighted_alphabet=weighted_alphabet,
+            unique=unique,
+        )
+        self.seed(seed)
+
+    def seed(self, seed: int) -> None:
+        # Like random.seed(), use the absolute value of negative seeds.
+        self.sampler = vectorized.NumpySampler(self.charset, self.counts,
+                                               abs(seed))
+        self.lengths: Iterator[int] = iter(())
+
+    def random_length(self) -> int:
+        if len(self.length_range) == 1:
+            return self.length_range.start
+        try:
+            return next(self.lengths)
+        except StopIteration:
+            self.lengths = iter(self.sampler.rng.integers(
+                self.length_range.start, self.length_range.stop,
+                size=LENGTH_BATCH_SIZE,
+            ).tolist())
+            return next(self.lengths)
+
+    def generate(self, length: int) -> str:
+        if self.unique:
+            self.check_length(length)
+            return self.sampler.sample(length)
+        return self.sampler.choices(length)
+
+
+def iter_output_pieces(
+    generator: RandomStringGenerator,
+    string_count: int,
+    delimiter: str,
+) -> Iterator[str]:
+    """
+    Generate `string_count` strings separated by `delimiter`, as the
+    sequence of pieces to write.
+    """
+    for index in range(string_count):
+        if index > 0:
+            yield delimiter
+        length = generator.random_length()
+        if length <= GENERATION_BLOCK_SIZE:
+            yield generator.generate(length)
+        else:
+            yield from generator.iter_blocks(length)
+
+
+def distinct_odds(
+    generator: RandomStringGenerator,
+    string_count: int,
+) -> tuple[int | None, float]:
+    """
+    Return the number of possible strings of `generator` (or None if
+    there are clearly at least `string_count`), and the probability that
+    two strings it generates are the same.
+    """
+    size = generator.unique_count
+    lengths = generator.length_range
+    if generator.unique:
+        # Longer strings would fail anyway.
+        lengths = range(lengths.start, min(lengths.stop, size + 1))
+
+    def log_possible(length: int) -> float:
+        """Natural log of the number of possible strings of `length`."""
+        if generator.unique:
+            return math.lgamma(size + 1) - math.lgamma(size - length + 1)
+        return length * math.log(size)
+
+    # There are enough strings of the longest length alone, or few
+    # enough possible lengths to add them all up.
+    possible = None
+    if not lengths or log_possible(lengths[-1]) < math.log(string_count):
+        if size <= 1:
+            possible = len(lengths)
+        elif generator.unique:
+            possible = sum(math.perm(size, length) for length in lengths)
+        else:
+            possible = sum(size ** length for length in lengths)
+        if not lengths:
+            return possible, 0.0
+
+    # Probability that two strings of the same length L are the same,
+    # summed over L.  Permutations are taken as equally likely.
+    if generator.unique:
+        same_string = 0.0
+        for length in lengths:
+            term = math.exp(-log_possible(length))
+            same_string += term
+            if term < 1e-18 * same_string:
+                break
     else:
-        chars = random.choices(charset, k=random_length, weights=counts)
+        same_char = generator.collision_probability()
+        if same_char == 1:
+            same_string = len(lengths)
+        else:
+            # Geometric series of same_char ** length.
+            same_string = same_char ** lengths.start \
+                * (1 - same_char ** len(lengths)) / (1 - same_char)
+
+    # Both strings are of each length with probability 1 / len(lengths).
+    return possible, same_string / len(lengths) ** 2
+
+
+def check_distinct_feasibility(
+    string_count: int,
+    possible_count: int | None,
+    same_string: float,
+) -> None:
+    """
+    Exit with an error if there are fewer than `string_count` possible
+    strings (unless `possible_count` is None), or warn if by the birthday
+    bound, many duplicates are expected to be rejected on the way to
+    `string_count` distinct ones, where any two strings are the same with
+    probability `same_string`.
+    """
+    if possible_count is not None and possible_count < string_count:
+        exit_with_error(
+            f"cannot generate {string_count} distinct strings, there "
+            f"are only {possible_count} possible strings",
+        )
+
+    expected_duplicates = string_count * (string_count - 1) / 2 \
+        * same_string
+    if expected_duplicates > DISTINCT_WARNING_RATIO * string_count:
+        log_warning(
+            f"about {expected_duplicates:.3g} duplicates are expected to be "
+            f"rejected on the way to {string_count} distinct strings (by "
+            f"the birthday bound), consider longer strings or a larger "
+            f"alphabet",
+        )
+
+
+def iter_distinct_pieces(
+    generate_batch: Callable[[int], list[str]],
+    string_count: int,
+    delimiter: str,
+) -> Iterator[str]:
+    """
+    Generate strings with `generate_batch` until there are `string_count`
+    distinct ones, separated by `delimiter`, rejecting duplicates.
+    """
+    seen = distinct_set(string_count)
+    remaining = string_count
+    stalled_draws = 0
+    separator = ""
+    while remaining > 0:
+        # Draw bigger batches while new strings are hard to come by.
+        batch_size = min(DISTINCT_BATCH_SIZE,
+                         max(remaining, stalled_draws))
+        new_strings = seen.filter_new(generate_batch(batch_size))
+        if not new_strings:
+            stalled_draws += batch_size
+            if stalled_draws >= DISTINCT_MAX_STALLED_DRAWS:
+                exit_with_error(
+                    f"gave up after generating only "
+                    f"{string_count - remaining} distinct strings",
+                )
+            continue
+        stalled_draws = 0
+        new_strings = new_strings[:remaining]
+        yield separator + delimiter.join(new_strings)
+        separator = delimiter
+        remaining -= len(new_strings)
+
+
+def iter_template_pieces(
+    program: Node,
+    string_count: int,
+    delimiter: str,
+) -> Iterator[str]:
+    """
+    Generate `string_count` strings from a compiled template, separated
+    by `delimiter`, TEMPLATE_BATCH_SIZE strings at a time.
+    """
+    for start in range(0, string_count, TEMPLATE_BATCH_SIZE):
+        if start > 0:
+            yield delimiter
+        batch_size = min(TEMPLATE_BATCH_SIZE, string_count - start)
+        yield delimiter.join(program.generate(batch_size))
+
+
+def first_of_batch(program: Node) -> str:
+    """Generate a single string from a compiled template."""
+    return program.generate(1)[0]
+
+
+def iter_indexed_pieces(
+    generator: RandomStringGenerator,
+    generate_one: Callable[[], str],
+    index_range: range,
+    delimiter: str,
+    *,
+    seed: int,
+) -> Iterator[str]:
+    """
+    Generate the strings at `index_range` of the sequence for `seed`,
+    separated by `delimiter`.  Before each string, `generator` is
+    reseeded from `seed` and the index of the string alone, so that the
+    string at any index is the same however it's reached.
+    """
+    for index in index_range:
+        if index > index_range.start:
+            yield delimiter
+        generator.seed(derive_seed(seed, INDEX_SEED_KEY, index))
+        yield generate_one()
+
 
-    return "".join(chars)
+@readonly_struct
+class GenerationJob:
+    """
+    Consecutive strings (or one block of a long string) of the output,
+    to generate from their own seed.
+    """
+    seed: int
+    lengths: list[int]
+    # Whether the first string is the rest of the previous job's string.
+    continues_string: bool
+
+
+def iter_generation_jobs(
+    generator: RandomStringGenerator,
+    string_count: int,
+    seed: int,
+) -> Iterator[GenerationJob]:
+    """
+    Split the output into jobs of about GENERATION_BLOCK_SIZE characters.
+    The split only depends on `seed`, so the output is the same however
+    many processes generate the jobs.
+    """
+    # The lengths are drawn upfront, separately from the characters.
+    length_rng = random.Random(seed)
+    job_count = 0
+    batch: list[int] = []
+    batch_size = 0
+
+    def make_job(lengths: list[int], continues_string: bool) -> GenerationJob:
+        nonlocal job_count
+        job_count += 1
+        return GenerationJob(
+            seed=derive_seed(seed, job_count - 1),
+            lengths=lengths,
+            continues_string=continues_string,
+        )
+
+    for _ in range(string_count):
+        length = length_rng.randrange(generator.length_range.start,
+                                      generator.length_range.stop)
+        # Fail here rather than in a worker process.
+        generator.check_length(length)
+        if length <= GENERATION_BLOCK_SIZE or generator.unique:
+            batch.append(length)
+            # Count the delimiters too, in case the strings are empty.
+            batch_size += length + 1
+            if batch_size >= GENERATION_BLOCK_SIZE:
+                yield make_job(batch, False)
+                batch = []
+                batch_size = 0
+            continue
+
+        if batch:
+            yield make_job(batch, False)
+            batch = []
+            batch_size = 0
+        for start in range(0, length, GENERATION_BLOCK_SIZE):
+            block_length = min(GENERATION_BLOCK_SIZE, length - start)
+            yield make_job([block_length], start > 0)
+    if batch:
+        yield make_job(batch, False)
+
+
+def generate_job(
+    generator: RandomStringGenerator,
+    delimiter: str,
+    job: GenerationJob,
+) -> str:
+    # Each job runs in its own process (or one after another), so the
+    # generator is free to be reseeded.
+    generator.seed(job.seed)
+    return delimiter.join(map(generator.generate, job.lengths))
+
+
+def iter_parallel_output_pieces(
+    generator: RandomStringGenerator,
+    string_count: int,
+    delimiter: str,
+    *,
+    seed: int,
+    jobs: int,
+) -> Iterator[str]:
+    """
+    Like iter_output_pieces(), but generate the output as jobs seeded
+    from `seed`, in `jobs` processes if more than 1.
+    """
+    generation_jobs = iter_generation_jobs(generator, string_count, seed)
+    # Peek at the split to know where delimiters go between the results.
+    generation_jobs, split = itertools.tee(generation_jobs)
+    generate = functools.partial(generate_job, generator, delimiter)
+
+    with contextlib.ExitStack() as stack:
+        if jobs == 1:
+            texts = map(generate, generation_jobs)
+        else:
+            executor = stack.enter_context(ProcessPoolExecutor(jobs))
+            # Keep a couple of jobs queued per process so none of them
+            # idle, without generating the whole output ahead.
+            texts = map_bounded(executor, generate, generation_jobs,
+                                max_pending=2 * jobs)
+
+        for index, (job, text) in enumerate(zip(split, texts)):
+            if index > 0 and not job.continues_string:
+                yield delimiter
+            yield text
+
+
+def write_pieces(pieces: Iterable[str], output: TextIO) -> None:
+    """
+    Write `pieces` to `output`, joining consecutive short pieces to keep
+    the number of writes down.
+    """
+    buffer: list[str] = []
+    buffered_length = 0
+    for piece in pieces:
+        buffer.append(piece)
+        buffered_length += len(piece)
+        if buffered_length >= WRITE_BUFFER_SIZE:
+            output.write("".join(buffer))
+            buffer.clear()
+            buffered_length = 0
+    output.write("".join(buffer))
 
 
 if __name__ == "__main__":
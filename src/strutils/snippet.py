@@ -75,17 +75,18 @@ def get_body_array(input_lines: list[str],
     output = io.StringIO()
     output.write("[\n")
     for line_num, line in enumerate(input_lines, start=1):
-        escaped = json.dumps(line)
-        output.write(indentation)
-        output.write(escaped)
-        if line_num < num_lines or trailing_comma:
-            output.write(",")
-        output.write("\n")
+        comma = line_num < num_lines or trailing_comma
+        output.write(format_body_entry(line, indentation, comma))
     output.write("]")
 
     return output.getvalue()
 
 
+def format_body_entry(line: str, indentation: str, comma: bool) -> str:
+    """Format a single line as an entry of the JSON body array."""
+    return f"{indentation}{json.dumps(line)}{',' if comma else ''}\n"
+
+
 def main() -> None:
     namespace = parser.parse_args()
 
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""test_aio.py
+
+Unit tester for the strutils.aio streaming interfaces.
+"""
+
+import asyncio
+import unittest
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+
+from strutils import aio
+
+
+async def chunks_of(*chunks: str | bytes) -> AsyncIterator[str | bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(stream: AsyncIterator[str]) -> str:
+    return "".join([chunk async for chunk in stream])
+
+
+class TestAio(unittest.IsolatedAsyncioTestCase):
+    async def test_lower_final_sigma_across_chunks(self) -> None:
+        result = await collect(aio.lower(chunks_of("ΟΔΟ", "Σ ΑΣ")))
+        self.assertEqual(result, "ΟΔΟΣ ΑΣ".lower())
+
+    async def test_upper(self) -> None:
+        result = await collect(aio.upper(chunks_of("hello ", "there")))
+        self.assertEqual(result, "HELLO THERE")
+
+    async def test_title_case_across_chunks(self) -> None:
+        source = chunks_of("hel", "lo th", "ere")
+        result = await collect(aio.upper(source, title=True))
+        self.assertEqual(result, "Hello There")
+
+    async def test_title_case_with_delimiter_across_chunks(self) -> None:
+        source = chunks_of("hello-TH", "ERE-gen", "eral")
+        result = await collect(
+            aio.upper(source, title=True, force=True, delimiter="-"),
+        )
+        self.assertEqual(result, "Hello-There-General")
+
+    async def test_long_text_without_whitespace_is_streamed(self) -> None:
+        chunk = "aΣ" * (1 << 14)
+        consumed = 0
+
+        async def source() -> AsyncIterator[str]:
+            nonlocal consumed
+            for _ in range(64):
+                consumed += 1
+                yield chunk
+
+        for transform in (aio.lower, aio.upper):
+            with self.subTest(transform=transform.__name__):
+                consumed = 0
+                stream = transform(source())
+                first = await anext(stream)
+                self.assertLess(consumed, 64)
+                rest = await collect(stream)
+                self.assertEqual(len(first + rest), 64 * len(chunk))
+
+    async def test_ord(self) -> None:
+        source = chunks_of("hel", "lo")
+        result = await collect(aio.ord(source, hexadecimal=True))
+        self.assertEqual(result, "68 65 6c 6c 6f")
+
+    async def test_ord_fixed_width(self) -> None:
+        source = chunks_of("\n", "a")
+        result = await collect(aio.ord(source, width=3, delimiter=","))
+        self.assertEqual(result, "010,097")
+
+    async def test_chr_tokens_split_across_chunks(self) -> None:
+        source = chunks_of("6", "5 6", "6 0x4", "3")
+        result = await collect(aio.chr(source))
+        self.assertEqual(result, "ABC")
+
+    async def test_chr_invalid_code_point(self) -> None:
+        with self.assertRaisesRegex(ValueError, "6A"):
+            await collect(aio.chr(chunks_of("65 6A")))
+
+    async def test_chr_huge_code_point(self) -> None:
+        with self.assertRaises(ValueError):
+            await collect(aio.chr(chunks_of("65 99999999999")))
+
+    async def test_snippet_crlf_split_across_chunks(self) -> None:
+        source = chunks_of(b"a\r", b"\nb\n")
+        result = await collect(aio.snippet(source))
+        self.assertEqual(result, '[\n    "a",\n    "b"\n]')
+
+    async def test_snippet_prefix(self) -> None:
+        source = chunks_of("$0")
+        result = await collect(
+            aio.snippet(source, prefix="header", trailing_comma=True),
+        )
+        self.assertEqual(
+            result,
+            '"prefix": "header",\n"body": [\n    "$0",\n]',
+        )
+
+    async def test_stream_reader_with_split_multibyte_character(self) -> None:
+        reader = asyncio.StreamReader()
+        reader.feed_data("CAFÉ".encode("utf-8"))
+        reader.feed_eof()
+        result = await collect(aio.lower(reader, chunk_size=1))
+        self.assertEqual(result, "café")
+
+    async def test_offload_to_executor(self) -> None:
+        source = chunks_of("72 101 ", "108 108 111")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            result = await collect(
+                aio.chr(source, executor=executor, offload_threshold=0),
+            )
+        self.assertEqual(result, "Hello")
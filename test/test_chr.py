@@ -6,6 +6,10 @@ Unit tester for the chr program.
 """
 
 import re
+import sys
+import unicodedata
+import unittest
+from importlib.util import find_spec
 
 from common import TestBase
 
@@ -86,6 +90,19 @@ class TestChr(TestBase):
         self.assert_success(result, "ABC\n", stderr_ok=True)
         self.assertRegex(result.stderr, re.compile(r"warning:", re.IGNORECASE))
 
+    def test_echo_quotes_and_spaces(self) -> None:
+        # Each character is escaped along with its padding, in which
+        # case a quote leaves only the padding (shown as SPC if a single
+        # space).
+        result = self.run_command("chr -e 0b101 32 39 34 92")
+        self.assert_success(result,
+                            "5  32 39 34 92\n\\x05     SPC SPC \\\\ \n")
+        result = self.run_command("chr -e -s 0b101 32 39 34 92")
+        self.assert_success(result,
+                            "5  32 39 34 92\n\\x05         \\\\ \n")
+        result = self.run_command("chr -e 32 39 34 100")
+        self.assert_success(result, "32  39  34  100\n          d  \n")
+
     def test_echo_converts_code_points_to_decimal(self) -> None:
         result = self.run_command("chr -xe 65 66 67")
         self.assert_success(result, "101 102 103\ne   f   g  \n")
@@ -124,3 +141,255 @@ class TestChr(TestBase):
             result,
             re.compile(r"error: 1102110", re.IGNORECASE),
         )
+
+    def test_empty_code_point(self) -> None:
+        for arguments in ("'' 65", "65 '' 66"):
+            with self.subTest(arguments=arguments):
+                result = self.run_command(f"chr {arguments}")
+                self.assert_immediate_exit_with_error_message(
+                    result,
+                    re.compile(r"could not be interpreted as an integer"),
+                )
+
+        result = self.run_command("chr --on-error=skip 65 '' 66")
+        self.assert_success(result, "A B\n", stderr_ok=True)
+
+    def test_on_error_fail_is_default(self) -> None:
+        result = self.run_command("chr --on-error=fail 65 0x110000 66")
+        self.assert_immediate_exit_with_error_message(
+            result,
+            re.compile(r"error: could not get the character", re.IGNORECASE),
+        )
+
+    def test_on_error_skip(self) -> None:
+        result = self.run_command("chr --on-error=skip 65 6A 0x110000 66")
+        self.assert_success(result, "A B\n", stderr_ok=True)
+        self.assertRegex(result.stderr, r"token 1: 6A")
+        self.assertRegex(result.stderr, r"token 2: could not get")
+        self.assertRegex(result.stderr, r"skipped 2 invalid")
+
+    def test_on_error_skip_huge_code_point(self) -> None:
+        # Too large for chr() to even convert to a C int.
+        for command in ("chr --on-error=skip 65 99999999999 66",
+                        "chr --on-error=skip -p --engine python",
+                        "chr --on-error=skip -p --engine auto"):
+            with self.subTest(command=command):
+                result = self.run_command(command, stdin="65 99999999999 66")
+                self.assertEqual(result.exit_code, 0)
+                self.assertIn("B", result.stdout)
+                self.assertRegex(result.stderr, r"token 1: could not get")
+
+    def test_on_error_replace(self) -> None:
+        result = self.run_command("chr -e --on-error=replace 65 6A 66")
+        self.assert_success(
+            result,
+            "65    65533 66   \nA     �     B    \n",
+            stderr_ok=True,
+        )
+        self.assertRegex(result.stderr, r"replaced 1 invalid")
+
+    def test_errors_file(self) -> None:
+        with self.temporary_file() as file:
+            result = self.run_command(
+                f"chr -p --on-error=skip --errors {file.name} "
+                "72 0x110000 105 6A",
+            )
+            records = file.read().splitlines()
+
+        self.assert_success(result, "Hi\n", stderr_ok=True)
+        self.assertEqual(len(records), 2)
+        self.assertRegex(records[0], r"^1\t0x110000\tcould not get")
+        self.assertRegex(records[1], r"^3\t6A\t6A could not be interpreted")
+        self.assertNotRegex(result.stderr, r"token \d")
+
+    def test_stream_tokens_across_chunk_boundaries(self) -> None:
+        # Big enough to span several chunks of the streaming tokenizer.
+        result = self.run_command("chr -p", stdin="0x41 0x42\n" * 20000)
+        self.assert_success(result, "AB" * 20000 + "\n")
+
+    def test_stream_one_per_line(self) -> None:
+        result = self.run_command("chr -1", stdin="72\n105\r\n33")
+        self.assert_success(result, "H\ni\n!\n")
+
+    def test_echo_one_per_line(self) -> None:
+        result = self.run_command("chr -e1 0x41 66 0103")
+        self.assert_success(result, "0x41 A \n66   B \n0103 C \n")
+
+    def test_echo_large_input(self) -> None:
+        result = self.run_command("chr -e", stdin="1000 65\n" * 20000)
+        self.assert_success(
+            result,
+            " ".join(["1000", "65  "] * 20000) + "\n"
+            + " ".join(["Ϩ   ", "A   "] * 20000) + "\n",
+        )
+
+    def test_align_window(self) -> None:
+        result = self.run_command("chr -e --align-window 2 65 1000 66 67 68")
+        self.assert_success(
+            result,
+            "65   1000\nA    Ϩ   \n66 67\nB  C \n68\nD \n",
+        )
+
+    def test_align_window_echo_one_per_line(self) -> None:
+        result = self.run_command("chr -e1 --align-window 2 0x41 66 1000")
+        self.assert_success(result, "0x41 A \n66   B \n1000 Ϩ   \n")
+
+    def test_read_packed_round_trip(self) -> None:
+        for packed_format in ("u32le", "u16le", "varint"):
+            with self.subTest(packed_format=packed_format):
+                result = self.run_command(
+                    f"ord --emit={packed_format} 'hé 😀' "
+                    f"| chr --read={packed_format} -p",
+                )
+                self.assert_success(result, "hé 😀\n")
+
+    def test_read_packed_echo(self) -> None:
+        result = self.run_command(
+            "ord --emit=varint AĀ | chr --read=varint -e",
+        )
+        self.assert_success(result, "65  256\nA   Ā  \n")
+
+    def test_read_packed_out_of_range(self) -> None:
+        result = self.run_command(
+            r"printf 'A\000\000\000\377\377\377\000B\000\000\000' "
+            "| chr --read=u32le -1 --on-error=replace",
+        )
+        self.assert_success(result, "A\n�\nB\n", stderr_ok=True)
+        self.assertRegex(result.stderr, r"token 1: could not get")
+
+        # The largest u32, and an overlong varint clamped to it.
+        for packed_format, data in [
+            ("u32le", r"A\0\0\0\377\377\377\377B\0\0\0"),
+            ("varint", r"A\377\377\377\377\377\177B"),
+        ]:
+            with self.subTest(packed_format=packed_format):
+                result = self.run_command(
+                    f"printf '{data}' | chr --read={packed_format} -p "
+                    "--on-error=replace",
+                )
+                self.assert_success(result, "A�B\n", stderr_ok=True)
+                self.assertRegex(result.stderr, r"token 1: could not get")
+
+    def test_read_packed_truncated(self) -> None:
+        result = self.run_command(r"printf 'A\000\000' | chr --read=u32le -p")
+        self.assert_immediate_exit_with_error_message(
+            result,
+            re.compile(r"error: input ended in the middle"),
+        )
+
+    def test_read_packed_rejects_arguments(self) -> None:
+        result = self.run_command("chr --read=u32le 65")
+        self.assert_immediate_exit_with_error_message(result)
+
+    def test_ranges(self) -> None:
+        result = self.run_command("chr -p 0x41..0x5A:2 97-101")
+        self.assert_success(result, "ACEGIKMOQSUWYabcde\n")
+
+    def test_range_with_explicit_base(self) -> None:
+        result = self.run_command("chr -x -d _ 44..4B")
+        self.assert_success(result, "D_E_F_G_H_I_J_K\n")
+
+    def test_range_echo_uses_decimal_values(self) -> None:
+        result = self.run_command("chr -e1 0x41..0x43")
+        self.assert_success(result, "65 A \n66 B \n67 C \n")
+
+    def test_range_skip_surrogates(self) -> None:
+        result = self.run_command("chr -1 --skip-surrogates 0xD7FF..0xE000")
+        self.assert_success(result, "퟿\n\n")
+
+    def test_range_expands_without_materializing(self) -> None:
+        def peak_memory(range_count: int) -> int:
+            # Peak RSS (KiB) of chr, measured from a parent process.
+            ranges = " ".join(["0..0x3FFFF"] * range_count)
+            command = f"chr -1 --skip-surrogates {ranges} > /dev/null"
+            result = self.run_command(
+                f"{sys.executable} -c \"import resource, subprocess; "
+                f"subprocess.run('{command}', shell=True, check=True); "
+                "print(resource.getrusage("
+                "resource.RUSAGE_CHILDREN).ru_maxrss)\"",
+            )
+            self.assertEqual(result.exit_code, 0)
+            return int(result.stdout)
+
+        # Each range is about 1 MiB of code points (and more as text), so
+        # memory use would grow a lot if they were built in full.
+        self.assertLess(peak_memory(8), peak_memory(1) + 16 * 1024)
+
+    def test_range_skip_unassigned(self) -> None:
+        # U+0378 and U+0379 are unassigned.
+        result = self.run_command("chr -p --skip-unassigned 0x376..0x37A")
+        self.assert_success(result, "Ͷͷͺ\n")
+
+    def test_align_window_counts_expanded_code_points(self) -> None:
+        result = self.run_command("chr --align-window 2 65..69")
+        self.assert_success(result, "A B\nC D\nE\n")
+
+    def test_invalid_range(self) -> None:
+        result = self.run_command("chr 70-65")
+        self.assert_immediate_exit_with_error_message(
+            result,
+            re.compile(r"error: 70-65 ends before it starts"),
+        )
+
+    def test_range_with_zero_step(self) -> None:
+        for arguments in ("65..70:0", "-x 41..45:0", "-x 41..45:0x0",
+                          "-b 1000001..1000101:00"):
+            with self.subTest(arguments=arguments):
+                result = self.run_command(f"chr {arguments}")
+                self.assert_immediate_exit_with_error_message(
+                    result,
+                    re.compile(r"has a step of 0, but it must be positive"),
+                )
+
+    def test_range_past_last_code_point(self) -> None:
+        result = self.run_command("chr -p 0x10FFFF..0x110000")
+        self.assert_immediate_exit_with_error_message(
+            result,
+            re.compile(r"error: 0x10FFFF..0x110000 extends past"),
+        )
+
+    def test_annotate(self) -> None:
+        result = self.run_command("chr --annotate name,block 65 10 0xE000")
+        self.assert_success(
+            result,
+            "A\tLATIN CAPITAL LETTER A\tBasic Latin\n"
+            "\\n\t<control-000A>\tBasic Latin\n"
+            "\\ue000\t<private-use-E000>\tPrivate Use Area\n",
+        )
+
+    def test_annotate_block_of_unicode_version(self) -> None:
+        # Added in Unicode 15.0.0, so unknown to older unicodedata.
+        expected = "No_Block"
+        version = tuple(map(int, unicodedata.unidata_version.split(".")))
+        if version >= (15, 0):
+            expected = "CJK Unified Ideographs Extension H"
+        result = self.run_command("chr --annotate block 0x31350")
+        self.assert_success(result, f"\\U00031350\t{expected}\n")
+
+    def test_annotate_echo(self) -> None:
+        result = self.run_command("chr -e --annotate category,width 0x301")
+        self.assert_success(result, "0x301 ́  \tMn\t0\n")
+
+    def test_annotate_with_print(self) -> None:
+        result = self.run_command("chr -p --annotate name 65")
+        self.assert_immediate_exit_with_error_message(result)
+
+    @unittest.skipUnless(find_spec("numpy"), "NumPy is not installed")
+    def test_numpy_engine_matches_python(self) -> None:
+        codes = " ".join(str(code) for code in range(0xE000, 0xF000, 7))
+        hex_codes = " ".join(f"{code:X}" for code in range(0xE000, 0xF000, 7))
+        for options, stdin in [
+            ("-p", codes),
+            ("-e", codes),
+            ("-1 --on-error=replace", codes + " 0x41 070 9999999 zz"),
+            ("-x -p", hex_codes),
+            ("-x 41 '' 42", None),
+            ("-x -p --on-error=replace 41 '' 42", None),
+        ]:
+            with self.subTest(options=options):
+                command = f"chr {options} --engine"
+                numpy_result = self.run_command(f"{command} numpy",
+                                                stdin=stdin)
+                python_result = self.run_command(f"{command} python",
+                                                 stdin=stdin)
+                self.assertEqual(numpy_result, python_result)
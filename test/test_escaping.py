@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""test_escaping.py
+
+Unit tester for the shared escape table of chr and ord.
+"""
+
+import random
+import unittest
+
+from strutils.common import escaping
+from strutils.common.escaping import (LATIN_1_ESCAPES, MAX_CACHED_ESCAPES,
+                                      escape)
+
+
+def uncached_escape(ch: str) -> str:
+    # What chr and ord computed for every character before the table.
+    return repr(ch).strip("'\"")
+
+
+class TestEscaping(unittest.TestCase):
+    def test_latin_1(self) -> None:
+        for code in range(0x100):
+            ch = chr(code)
+            self.assertEqual(escape(ch), uncached_escape(ch), hex(code))
+        self.assertEqual(len(LATIN_1_ESCAPES), 0x100)
+
+    def test_bmp_and_astral_sample(self) -> None:
+        rng = random.Random(0)
+        codes = [code for code in rng.sample(range(0x110000), 5000)
+                 if not 0xD800 <= code <= 0xDFFF]
+        codes += [0x2028, 0xFEFF, 0xFFFF, 0x1F600, 0xE0001, 0x10FFFF]
+        # Twice, so that cached escapes are checked too.
+        for ch in map(chr, codes * 2):
+            self.assertEqual(escape(ch), uncached_escape(ch), hex(ord(ch)))
+
+    def test_past_cache_limit(self) -> None:
+        # More distinct BMP characters than are cached.
+        codes = range(0x100, 0x100 + 2 * MAX_CACHED_ESCAPES)
+        for ch in map(chr, list(codes) * 2):
+            self.assertEqual(escape(ch), uncached_escape(ch), hex(ord(ch)))
+        # pylint: disable=protected-access
+        self.assertLessEqual(len(escaping._escapes),
+                             len(LATIN_1_ESCAPES) + MAX_CACHED_ESCAPES)
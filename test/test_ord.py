@@ -5,8 +5,14 @@
 Unit tester for the ord program.
 """
 
+import unittest
+from argparse import Namespace
+from importlib.util import find_spec
+
 from common import TestBase
 
+from strutils.ord import MAX_CACHED_FORMATS, CharFormatter
+
 
 # pylint: disable=too-many-public-methods
 class TestOrd(TestBase):
@@ -162,3 +168,213 @@ class TestOrd(TestBase):
             "l 108\n"
             "o 111\n",
         )
+
+    def test_align_window(self) -> None:
+        result = self.run_command("ord -e --align-window 4 \"hi there\"")
+        self.assert_success(
+            result,
+            "h   i   SPC t  \n"
+            "104 105 032 116\n"
+            "h   e   r   e  \n"
+            "104 101 114 101\n",
+        )
+
+    def test_align_window_stdin(self) -> None:
+        result = self.run_command("ord -x --align-window 3", stdin="aĀb")
+        self.assert_success(result, "061 100 062\n")
+
+    def test_align_window_rejects_zero(self) -> None:
+        result = self.run_command("ord --align-window 0 hello")
+        self.assert_immediate_exit_with_error_message(result)
+
+    def test_emit_packed_formats(self) -> None:
+        hexdump = (
+            "python3 -c 'import sys; print(sys.stdin.buffer.read().hex())'"
+        )
+        for packed_format, expected in [
+            ("u32le", "68000000e900000000f60100"),
+            ("u16le", "6800e9003dd800de"),
+            ("varint", "68e90180ec07"),
+        ]:
+            with self.subTest(packed_format=packed_format):
+                result = self.run_command(
+                    f"ord --emit={packed_format} hé😀 | {hexdump}",
+                )
+                self.assert_success(result, expected + "\n")
+
+    def test_annotate(self) -> None:
+        result = self.run_command("ord -x --annotate name,category,width a漢")
+        self.assert_success(
+            result,
+            "0061\tLATIN SMALL LETTER A\tLl\t1\n"
+            "6f22\tCJK UNIFIED IDEOGRAPH-6F22\tLo\t2\n",
+        )
+
+    def test_annotate_invalid_field(self) -> None:
+        result = self.run_command("ord --annotate name,color a")
+        self.assert_immediate_exit_with_error_message(result)
+
+    def test_fixed_width(self) -> None:
+        result = self.run_command("ord --width 4 hi")
+        self.assert_success(result, "0104 0105\n")
+
+    def test_unicode_width(self) -> None:
+        result = self.run_command("ord -x -1 --width unicode", stdin="hi")
+        self.assert_success(result, "000068\n000069\n")
+
+    def test_auto_width_high_code_point(self) -> None:
+        result = self.run_command("ord -o", stdin="\U0010ffffa")
+        self.assert_success(result, "4177777 0000141\n")
+
+    def test_invalid_width(self) -> None:
+        result = self.run_command("ord --width wide hi")
+        self.assert_immediate_exit_with_error_message(result)
+
+    def test_bytes(self) -> None:
+        result = self.run_command("ord --bytes -X -d : -- héllo")
+        self.assert_success(result, "68:C3:A9:6C:6C:6F\n")
+
+    def test_bytes_encoding(self) -> None:
+        result = self.run_command("ord --bytes=utf-16le -xp -1", stdin="hé")
+        self.assert_success(result, "0x68\n0x00\n0xe9\n0x00\n")
+
+    def test_bytes_unencodable(self) -> None:
+        result = self.run_command("ord --bytes=ascii hé")
+        self.assert_immediate_exit_with_error_message(result)
+
+    def test_columns_with_offsets(self) -> None:
+        result = self.run_command("ord -x --offsets --columns 4 -- 'hé\tllo'")
+        self.assert_success(
+            result,
+            "00000000: 000068 0000e9 000009 00006c  hé.l\n"
+            "00000004: 00006c 00006f                lo\n",
+        )
+
+    def test_bytes_columns_skip_length(self) -> None:
+        result = self.run_command(
+            "ord --bytes -x --offsets --skip 1 --length 5",
+            stdin="hello, world",
+        )
+        self.assert_success(
+            result,
+            "00000001: 65 6c 6c 6f 2c                                   "
+            "ello,\n",
+        )
+
+    def test_skip_without_columns(self) -> None:
+        result = self.run_command("ord --skip 1 hello")
+        self.assert_immediate_exit_with_error_message(result)
+
+    @unittest.skipUnless(find_spec("numpy"), "NumPy is not installed")
+    def test_numpy_engine_matches_python(self) -> None:
+        text = "".join(
+            chr(code) for code in range(1, 0x10FFFF, 997)
+            if not 0xD800 <= code <= 0xDFFF
+        )
+        for options in ["", "-X -p", "-o", "-0 -p", "-b", "-1 --width 7"]:
+            with self.subTest(options=options):
+                command = f"ord {options} --engine"
+                numpy_result = self.run_command(f"{command} numpy",
+                                                stdin=text)
+                python_result = self.run_command(f"{command} python",
+                                                 stdin=text)
+                self.assertEqual(numpy_result, python_result)
+
+    def test_histogram(self) -> None:
+        result = self.run_command("ord -x --histogram", stdin="hello world")
+        self.assert_success(
+            result,
+            "6c 3\n6f 2\n20 1\n64 1\n65 1\n68 1\n72 1\n77 1\n",
+        )
+
+    def test_histogram_top_echo(self) -> None:
+        result = self.run_command("ord -e -t --histogram --top 2 mississippi")
+        self.assert_success(result, "i 105\t4\ns 115\t4\n")
+
+    def test_histogram_jobs(self) -> None:
+        text = "".join(chr(code) for code in range(0x20, 0x3000)) * 50
+        single = self.run_command("ord --histogram", stdin=text)
+        parallel = self.run_command("ord --histogram --jobs 3", stdin=text)
+        self.assertEqual(parallel, single)
+
+    def test_top_without_histogram(self) -> None:
+        result = self.run_command("ord --top 3 hello")
+        self.assert_immediate_exit_with_error_message(result)
+
+
+# pylint: disable=protected-access
+class TestCharFormatter(unittest.TestCase):
+    # More distinct non-ASCII characters than are cached per width.
+    MANY_CHARS = "".join(map(chr, range(0x100,
+                                        0x100 + 2 * MAX_CACHED_FORMATS)))
+
+    def make_formatter(self, *, hexadecimal: bool) -> CharFormatter:
+        options = Namespace(strings=[],
+                            prefixed=False,
+                            uppercase=False,
+                            X=False,
+                            hexadecimal=hexadecimal,
+                            octal=False,
+                            use_octal_c_style=False,
+                            binary=False)
+        return CharFormatter(options)
+
+    def assert_formats(self, formatter: CharFormatter, string: str,
+                       width: int, *, hexadecimal: bool,
+                       echoing: bool = False) -> None:
+        # Compare with formatting each code point from scratch, twice so
+        # that cached entries are checked too.
+        spec = f"0{width}{'x' if hexadecimal else 'd'}"
+        expected = [format(ord(ch), spec) for ch in string]
+        for _ in range(2):
+            self.assertEqual(list(formatter.format_all(string, echoing)),
+                             expected)
+            self.assertEqual([formatter(ch, echoing) for ch in string],
+                             expected)
+
+    def test_cache_size_limit(self) -> None:
+        formatter = self.make_formatter(hexadecimal=True)
+        formatter.fit(self.MANY_CHARS)
+        self.assert_formats(formatter, self.MANY_CHARS, 4, hexadecimal=True)
+        self.assertLessEqual(len(formatter._table), 0x80 + MAX_CACHED_FORMATS)
+        # Characters past the limit are still formatted, just not cached.
+        self.assert_formats(formatter, "\uffff\u4e00A", 4, hexadecimal=True)
+
+    def test_widths_reused_across_fits(self) -> None:
+        formatter = self.make_formatter(hexadecimal=True)
+        formatter.fit("abc")
+        narrow_table = formatter._table
+        self.assert_formats(formatter, "abc", 2, hexadecimal=True)
+
+        formatter.fit(self.MANY_CHARS)
+        self.assertIsNot(formatter._table, narrow_table)
+        self.assert_formats(formatter, self.MANY_CHARS, 4, hexadecimal=True)
+
+        formatter.fit("xyz")
+        self.assertIs(formatter._table, narrow_table)
+        self.assert_formats(formatter, "xyzabc", 2, hexadecimal=True)
+
+        # The full wide table is reused as is.
+        formatter.fit("\u1234")
+        self.assert_formats(formatter, self.MANY_CHARS, 4, hexadecimal=True)
+
+    def test_echo_and_plain_tables_kept_apart(self) -> None:
+        # "\x00" is echoed as 4 characters, but formatted as 1 digit.
+        formatter = self.make_formatter(hexadecimal=False)
+        formatter.fit("\x00\x01\x02")
+        self.assertIsNot(formatter._echo_table, formatter._table)
+        for _ in range(2):
+            self.assert_formats(formatter, "\x00\x01\x02", 1,
+                                hexadecimal=False)
+            self.assert_formats(formatter, "\x00\x01\x02", 4,
+                                hexadecimal=False, echoing=True)
+
+        # Also once the caches are full: U+E0001 takes 5 hex digits, but
+        # is echoed as "\U000e0001".
+        formatter = self.make_formatter(hexadecimal=True)
+        formatter.fit("\U000e0001")
+        for echoing, width in ((False, 5), (True, 10)):
+            self.assert_formats(formatter, self.MANY_CHARS, width,
+                                hexadecimal=True, echoing=echoing)
+        for table in (formatter._table, formatter._echo_table):
+            self.assertLessEqual(len(table), 0x80 + MAX_CACHED_FORMATS)
@@ -5,12 +5,32 @@
 Unit tester for the randstr program.
 """
 
+import collections
+import math
+import os
+import tempfile
+import unicodedata
+import unittest
+from importlib.util import find_spec
+from pathlib import Path
+from unittest import mock
+
 from common import TestBase
 
 
 class TestRandstr(TestBase):
     SEED = 69
 
+    def setUp(self) -> None:
+        # Keep the on-disk cache of Unicode classes out of ~/.cache.
+        cache_home = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_home.cleanup)
+        self.cache_home = Path(cache_home.name)
+        environment = mock.patch.dict(os.environ,
+                                      XDG_CACHE_HOME=cache_home.name)
+        environment.start()
+        self.addCleanup(environment.stop)
+
     def test_basic(self) -> None:
         result = self.run_command(f"randstr 42 -s {self.SEED}")
         self.assert_success(
@@ -58,3 +78,243 @@ class TestRandstr(TestBase):
     def test_repeating_same_character(self) -> None:
         result = self.run_command("randstr 30 -a E")
         self.assert_success(result, "E" * 30)
+
+    def test_count(self) -> None:
+        result = self.run_command(f"randstr 42 -N 3 -n -s {self.SEED}")
+        self.assertEqual(result.exit_code, 0)
+        lines = result.stdout.splitlines()
+        self.assertEqual(len(lines), 3)
+        # The first string is the same as when generating only one.
+        self.assertEqual(lines[0], "fkLu4W1zZJZtHBzyzjitROUSYgyMe2SxcfbppjDXRN")
+
+    def test_count_with_delimiter(self) -> None:
+        result = self.run_command("randstr 2 -N 3 -d , -a E")
+        self.assert_success(result, "EE,EE,EE")
+
+    def test_output_file(self) -> None:
+        # Long enough to be generated in several blocks.
+        expected = self.run_command(f"randstr 200000 -n -s {self.SEED}")
+        with self.temporary_file() as file:
+            result = self.run_command(
+                f"randstr 200000 -n -s {self.SEED} -o {file.name}",
+            )
+            self.assert_success(result, "")
+            self.assertEqual(file.read(), expected.stdout)
+        self.assertEqual(len(expected.stdout), 200001)
+
+    def test_jobs_independent_of_worker_count(self) -> None:
+        for arguments in ("200000", "0-30 -N 10000 -d ,", "5-8 -u -N 50"):
+            with self.subTest(arguments=arguments):
+                results = [
+                    self.run_command(
+                        f"randstr {arguments} -s {self.SEED} -j {jobs}",
+                    )
+                    for jobs in (1, 3)
+                ]
+                self.assertEqual(results[0].exit_code, 0)
+                self.assertEqual(results[0], results[1])
+
+    def test_secure(self) -> None:
+        for arguments in ("", "-a abbccc", "-a αβγ", "-c D -u"):
+            with self.subTest(arguments=arguments):
+                result = self.run_command(
+                    f"randstr 10 -N 1000 --secure {arguments}",
+                )
+                self.assertEqual(result.exit_code, 0)
+                strings = result.stdout.split("\n")
+                self.assertEqual(len(strings), 1000)
+                self.assertTrue(all(len(string) == 10 for string in strings))
+        result = self.run_command("randstr 100000 --secure -a abbccc")
+        self.assert_follows_weights(result.stdout, {"a": 1, "b": 2, "c": 3})
+
+    def test_secure_rejects_seed(self) -> None:
+        result = self.run_command("randstr 10 --secure -s 42")
+        self.assert_immediate_exit_with_error_message(result)
+
+    @unittest.skipUnless(find_spec("numpy"), "NumPy is not installed")
+    def test_numpy_engine(self) -> None:
+        for arguments, alphabet in [("", None), ("-a abbccc", "abc"),
+                                    ("-a αβγ😀", "αβγ😀"),
+                                    ("-c D -u", "0123456789")]:
+            with self.subTest(arguments=arguments):
+                command = (f"randstr 1-10 -N 1000 -s {self.SEED} "
+                           f"--engine numpy {arguments}")
+                result = self.run_command(command)
+                self.assertEqual(result.exit_code, 0)
+                # Reproducible from the seed.
+                self.assertEqual(self.run_command(command), result)
+                strings = result.stdout.split("\n")
+                self.assertEqual(len(strings), 1000)
+                self.assertTrue(all(1 <= len(string) <= 10
+                                    for string in strings))
+                if alphabet is not None:
+                    self.assertLessEqual(set(result.stdout) - {"\n"},
+                                         set(alphabet))
+
+        result = self.run_command(
+            f"randstr 300000 -a abbccc -s {self.SEED} --engine numpy",
+        )
+        self.assert_follows_weights(result.stdout, {"a": 1, "b": 2, "c": 3})
+
+    def test_unicode_classes(self) -> None:
+        result = self.run_command(f"randstr 500 -c gc=Lu -s {self.SEED}")
+        # The index of general categories is cached.
+        self.assertTrue(any((self.cache_home / "strutils").iterdir()))
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(len(result.stdout), 500)
+        self.assertTrue(all(unicodedata.category(ch) == "Lu"
+                            for ch in result.stdout))
+
+        # Combined with ASCII classes, as a union.
+        result = self.run_command(
+            f"randstr 36 -u -c gc=Nd -c L -s {self.SEED}",
+        )
+        self.assertEqual(len(set(result.stdout)), 36)
+
+        result = self.run_command(
+            f"randstr 135 -u -c 'blk=greek and coptic' -s {self.SEED}",
+        )
+        self.assertEqual(len(set(result.stdout)), 135)
+        self.assertTrue(all(0x370 <= ord(ch) <= 0x3FF
+                            for ch in result.stdout))
+
+        result = self.run_command("randstr 136 -u -c blk=Greek_and_Coptic")
+        self.assert_immediate_exit_with_error_message(result)
+
+        result = self.run_command("randstr 5 -c gc=Xx -a E")
+        self.assert_success(result, "EEEEE", stderr_ok=True)
+        self.assertIn("unknown character class", result.stderr)
+
+        result = self.run_command("randstr 5 -c gc=Cs -a E")
+        self.assert_success(result, "EEEEE", stderr_ok=True)
+        self.assertIn("ignoring surrogates in 'gc=Cs': they can't be "
+                      "generated", result.stderr)
+
+    def test_template(self) -> None:
+        result = self.run_command(
+            f"randstr -t '[A-Z]{{3}}-[0-9]{{4}}' -N 3 -s {self.SEED}",
+        )
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(
+            self.run_command(f"randstr -t '[A-Z]{{3}}-[0-9]{{4}}' -N 3 "
+                             f"-s {self.SEED}"),
+            result,
+        )
+        lines = result.stdout.split("\n")
+        self.assertEqual(len(lines), 3)
+        for line in lines:
+            self.assertRegex(line, r"^[A-Z]{3}-[0-9]{4}$")
+
+        result = self.run_command(
+            r"randstr -t 'id\.(ab|c){2}_.{1,3}[xy-]?' -a E -N 500 -d ,",
+        )
+        self.assertEqual(result.exit_code, 0)
+        for string in result.stdout.split(","):
+            self.assertRegex(string, r"^id\.(ab|c){2}_E{1,3}[xy-]?$")
+
+    def test_invalid_template(self) -> None:
+        for template in ("[A-Z", "(ab", "ab)", "a{3,2}", "{2}"):
+            with self.subTest(template=template):
+                result = self.run_command(f"randstr -t '{template}'")
+                self.assert_immediate_exit_with_error_message(result)
+
+        result = self.run_command("randstr 10 -t x")
+        self.assert_immediate_exit_with_error_message(result)
+
+    def test_distinct(self) -> None:
+        # Exactly every possible string, in a random order.
+        result = self.run_command(f"randstr 2 -c D --distinct 100 -d , "
+                                  f"-s {self.SEED}")
+        self.assertEqual(result.exit_code, 0)
+        strings = result.stdout.split(",")
+        self.assertCountEqual(strings, [f"{n:02}" for n in range(100)])
+        self.assertIn("birthday bound", result.stderr)
+
+        result = self.run_command("randstr -t 'id-[0-9]{3}' --distinct 1000")
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(len(set(result.stdout.split("\n"))), 1000)
+        self.assertIn("birthday bound", result.stderr)
+
+        result = self.run_command("randstr -t '[a-z]{8}' --distinct 1000")
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(result.stderr, "")
+
+        result = self.run_command("randstr 10 --distinct 5000")
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(result.stderr, "")
+        self.assertEqual(len(set(result.stdout.split("\n"))), 5000)
+
+    def test_index(self) -> None:
+        for options in ("5-10 -c gc=Lu", "5-10 -u", "-t '[a-z]{2,4}-.'"):
+            with self.subTest(options=options):
+                result = self.run_command(
+                    f"randstr {options} -s {self.SEED} --index 20-29",
+                )
+                self.assertEqual(result.exit_code, 0)
+                shard = result.stdout.split("\n")
+                self.assertEqual(len(shard), 10)
+                # Any string can be regenerated on its own.
+                for index in (20, 27):
+                    self.assert_success(
+                        self.run_command(f"randstr {options} -s {self.SEED} "
+                                         f"--index {index}"),
+                        shard[index - 20],
+                    )
+                self.assertEqual(
+                    self.run_command(f"randstr {options} -s {self.SEED} "
+                                     f"--index 25-34").stdout.split("\n")[:5],
+                    shard[5:],
+                )
+
+        for command in ("randstr 5 --index 3-1", "randstr 5 --index -1",
+                        "randstr 5 --index 1 -N 2", "randstr 5 --index 1 -j 2",
+                        "randstr 5 --index 1 --secure"):
+            with self.subTest(command=command):
+                result = self.run_command(command)
+                self.assert_immediate_exit_with_error_message(result)
+
+    def test_distinct_impossible(self) -> None:
+        for command in ("randstr 2 -c D --distinct 101",
+                        "randstr 1-3 -a ab --distinct 15",
+                        "randstr 3 -u -a abc --distinct 7",
+                        "randstr -t '[ab]{2}' --distinct 5",
+                        "randstr -t 'x(a|bc)?' --distinct 4",
+                        "randstr -t '.{2}' -c D --distinct 101"):
+            with self.subTest(command=command):
+                result = self.run_command(command)
+                self.assert_immediate_exit_with_error_message(result)
+
+        result = self.run_command("randstr 2 -N 5 --distinct 5")
+        self.assert_immediate_exit_with_error_message(result)
+
+    def test_large_weighted_alphabet_distribution(self) -> None:
+        # Enough distinct characters to be sampled with an alias table.
+        weights = {chr(0x4E00 + index): index % 7 + 1 for index in range(300)}
+        for source in (f"-s {self.SEED}", "--secure"):
+            with self.subTest(source=source), self.temporary_file() as file:
+                file.write("".join(ch * weight
+                                   for ch, weight in weights.items()))
+                file.flush()
+                result = self.run_command(
+                    f"randstr 200000 -f {file.name} {source}",
+                )
+                self.assertEqual(result.exit_code, 0)
+                self.assertEqual(len(result.stdout), 200000)
+                self.assert_follows_weights(result.stdout, weights)
+
+    def assert_follows_weights(self, chars: str,
+                               weights: dict[str, int]) -> None:
+        frequencies = collections.Counter(chars)
+        self.assertLessEqual(frequencies.keys(), weights.keys())
+
+        # Pearson's chi-squared test: the statistic has a mean of the
+        # degrees of freedom and a variance of twice that.
+        total = sum(weights.values())
+        statistic = sum(
+            (frequencies[ch] - len(chars) * weight / total) ** 2
+            / (len(chars) * weight / total)
+            for ch, weight in weights.items()
+        )
+        freedom = len(weights) - 1
+        self.assertLess(statistic, freedom + 6 * math.sqrt(2 * freedom))